@@ -11,18 +11,55 @@ import os
 import re
 import csv
 import json
+import heapq
 import hashlib
-from dataclasses import dataclass, field
-from typing import List, Dict, Set, Tuple, Optional
+import time
+import cProfile
+import mmap
+import struct
+import sys
+import argparse
+import fnmatch
+import multiprocessing
+import queue
+import threading
+import socketserver
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace, asdict
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain
+from array import array
+from typing import List, Dict, Set, Tuple, Optional, Callable, Iterator, Iterable
+from collections import OrderedDict, Counter
+from functools import lru_cache
 from enum import Enum
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # the numpy matching backend is optional
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
 class ImplementationStatus(Enum):
     IMPLEMENTED = "Implemented"
     PARTIALLY_IMPLEMENTED = "Partially"
     MISSING = "Missing"
     INCONSISTENT = "Inconsistent"
 
+class CodeType(Enum):
+    FUNCTION = "function"
+    CONSTANT = "constant"
+    SELECTOR = "selector"
+    CLASS = "class"
+    VARIABLE = "variable"
+
 @dataclass
 class RequirementSpec:
     """Represents a single requirement from the specification"""
@@ -34,15 +71,305 @@ class RequirementSpec:
     technical_details: List[str] = field(default_factory=list)
     acceptance_criteria: List[str] = field(default_factory=list)
 
+# Longer source lines (inlined bundles, data URIs) are never hand-written
+# code: extraction skips them and they read as blank context
+MAX_LINE_LENGTH = 10000
+
+def read_source_lines(file_path: str) -> List[str]:
+    """Read a source file as a list of stripped lines, blanking overlong ones"""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [line.strip() if len(line) <= MAX_LINE_LENGTH else '' for line in f]
+
+class SourceLineCache:
+    """Bounded LRU of stripped source lines, used to materialize context lazily
+    
+    Safe to share between threads: the streaming pipeline reads context on
+    its consumer thread while the producer thread is analyzing files.
+    """
+    
+    def __init__(self, max_files: int = 8):
+        self.max_files = max_files
+        self._files: 'OrderedDict[str, List[str]]' = OrderedDict()
+        # Lines loaded from an evidence snapshot; never evicted or re-read
+        self._pinned: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def get_lines(self, file_path: str) -> List[str]:
+        """Return the stripped lines of a file, reading it on a cache miss"""
+        with self._lock:
+            lines = self._pinned.get(file_path)
+            if lines is not None:
+                return lines
+            lines = self._files.get(file_path)
+            if lines is not None:
+                self._files.move_to_end(file_path)
+                return lines
+        
+        try:
+            lines = read_source_lines(file_path)
+        except OSError:
+            lines = []
+        self.put(file_path, lines)
+        return lines
+    
+    def put(self, file_path: str, lines: List[str]):
+        """Remember lines that were already read for a file"""
+        with self._lock:
+            self._pinned.pop(file_path, None)
+            self._files[file_path] = lines
+            self._files.move_to_end(file_path)
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+    
+    def pin(self, file_path: str, lines: List[str]):
+        """Serve a file's lines from memory until it is invalidated"""
+        with self._lock:
+            self._pinned[file_path] = lines
+            self._files.pop(file_path, None)
+    
+    def invalidate(self, file_path: Optional[str] = None):
+        """Forget one file (or all files) after it changed on disk"""
+        with self._lock:
+            if file_path is None:
+                self._files.clear()
+                self._pinned.clear()
+            else:
+                self._files.pop(file_path, None)
+                self._pinned.pop(file_path, None)
+
+source_lines = SourceLineCache()
+
+def prefetch(items: Iterable, size: int = 64) -> Iterator:
+    """Iterate over items on a producer thread, handing them over through a bounded queue
+    
+    The producer runs at most ``size`` items ahead of the consumer. Exceptions
+    raised by the producer are re-raised to the consumer, and closing the
+    returned generator early stops (and closes) the producer.
+    """
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    end = object()
+    iterator = iter(items)
+    
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        error = None
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+        put((end, error))
+    
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
 @dataclass
 class ImplementationEvidence:
-    """Represents implementation evidence found in code"""
+    """Represents implementation evidence found in code
+    
+    Context is stored as a span of source line indices; the stripped lines
+    are only read back from the file when ``context_lines`` is accessed.
+    """
     file_path: str
     line_number: int
     code_type: str  # 'function', 'constant', 'selector', 'class', 'variable'
     name: str
     content: str
-    context_lines: List[str] = field(default_factory=list)
+    context_span: Tuple[int, int] = (0, 0)
+    
+    @property
+    def context_lines(self) -> List[str]:
+        """Stripped source lines surrounding the evidence"""
+        start, end = self.context_span
+        return source_lines.get_lines(self.file_path)[start:end]
+
+class EvidenceView:
+    """Read-only, ImplementationEvidence-compatible view of one EvidenceStore row"""
+    
+    __slots__ = ('_store', '_index')
+    
+    def __init__(self, store: 'EvidenceStore', index: int):
+        self._store = store
+        self._index = index
+    
+    @property
+    def index(self) -> int:
+        return self._index
+    
+    @property
+    def file_path(self) -> str:
+        return self._store.paths[self._store.path_ids[self._index]]
+    
+    @property
+    def line_number(self) -> int:
+        return self._store.line_numbers[self._index]
+    
+    @property
+    def code_type(self) -> str:
+        return EvidenceStore.CODE_TYPES[self._store.code_types[self._index]]
+    
+    @property
+    def name(self) -> str:
+        return self._store.strings[self._store.name_ids[self._index]]
+    
+    @property
+    def content(self) -> str:
+        return self._store.strings[self._store.content_ids[self._index]]
+    
+    @property
+    def context_span(self) -> Tuple[int, int]:
+        return (self._store.context_starts[self._index], self._store.context_ends[self._index])
+    
+    @property
+    def context_lines(self) -> List[str]:
+        """Stripped source lines surrounding the evidence"""
+        return source_lines.get_lines(self.file_path)[slice(*self.context_span)]
+    
+    def to_evidence(self) -> ImplementationEvidence:
+        """Materialize the row as a standalone ImplementationEvidence"""
+        return ImplementationEvidence(
+            file_path=self.file_path,
+            line_number=self.line_number,
+            code_type=self.code_type,
+            name=self.name,
+            content=self.content,
+            context_span=self.context_span
+        )
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EvidenceView):
+            return NotImplemented
+        return self._store is other._store and self._index == other._index
+    
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._index))
+    
+    def __repr__(self) -> str:
+        return (f"EvidenceView(file_path={self.file_path!r}, line_number={self.line_number}, "
+                f"code_type={self.code_type!r}, name={self.name!r})")
+
+class EvidenceStore:
+    """Columnar, memory-compact container of implementation evidence
+    
+    File paths, names and contents are interned into string tables and every
+    other field lives in a typed array, so holding hundreds of thousands of
+    evidence items costs a handful of arrays instead of one object (and one
+    GC-tracked ``__dict__``) per item. Indexing and iteration yield
+    EvidenceView objects that expose the ImplementationEvidence attributes.
+    """
+    
+    CODE_TYPES = [code_type.value for code_type in CodeType]
+    _CODE_TYPE_IDS = {code_type: i for i, code_type in enumerate(CODE_TYPES)}
+    
+    def __init__(self, evidence: Optional[List[ImplementationEvidence]] = None):
+        self.paths: List[str] = []
+        self.strings: List[str] = []
+        self.path_ids = array('I')
+        self.line_numbers = array('I')
+        self.code_types = array('B')
+        self.name_ids = array('I')
+        self.content_ids = array('I')
+        self.context_starts = array('I')
+        self.context_ends = array('I')
+        self.file_ranges: Dict[str, Tuple[int, int]] = {}
+        self._path_table: Dict[str, int] = {}
+        self._string_table: Dict[str, int] = {}
+        
+        if evidence:
+            self.extend(evidence)
+    
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [EvidenceView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("evidence index out of range")
+        return EvidenceView(self, index)
+    
+    def __iter__(self) -> Iterator[EvidenceView]:
+        for i in range(len(self)):
+            yield EvidenceView(self, i)
+    
+    def append(self, evidence: ImplementationEvidence):
+        """Add a single evidence item"""
+        self.path_ids.append(self._intern_path(evidence.file_path))
+        self.line_numbers.append(evidence.line_number)
+        self.code_types.append(self._CODE_TYPE_IDS[evidence.code_type])
+        self.name_ids.append(self._intern(evidence.name))
+        self.content_ids.append(self._intern(evidence.content))
+        start, end = evidence.context_span
+        self.context_starts.append(start)
+        self.context_ends.append(end)
+    
+    def extend(self, evidence: List[ImplementationEvidence]):
+        """Add evidence items in order"""
+        for item in evidence:
+            self.append(item)
+    
+    def add_file(self, file_path: str, evidence: List[ImplementationEvidence]):
+        """Add all evidence extracted from one file and record its row range"""
+        start = len(self)
+        self.extend(evidence)
+        self.file_ranges[file_path] = (start, len(self))
+    
+    def copy_file(self, source: 'EvidenceStore', file_path: str):
+        """Add the rows another store holds for one file and record their row range"""
+        source_start, source_end = source.file_ranges.get(file_path, (0, 0))
+        start = len(self)
+        
+        self.path_ids.extend([self._intern_path(file_path)] * (source_end - source_start))
+        self.line_numbers.extend(source.line_numbers[source_start:source_end])
+        self.code_types.extend(source.code_types[source_start:source_end])
+        self.name_ids.extend(self._intern(source.strings[i]) for i in source.name_ids[source_start:source_end])
+        self.content_ids.extend(self._intern(source.strings[i]) for i in source.content_ids[source_start:source_end])
+        self.context_starts.extend(source.context_starts[source_start:source_end])
+        self.context_ends.extend(source.context_ends[source_start:source_end])
+        self.file_ranges[file_path] = (start, len(self))
+    
+    def _intern_path(self, file_path: str) -> int:
+        """Return the path table id for a file path"""
+        path_id = self._path_table.get(file_path)
+        if path_id is None:
+            path_id = self._path_table[file_path] = len(self.paths)
+            self.paths.append(file_path)
+        return path_id
+    
+    def _intern(self, text: str) -> int:
+        """Return the string table id for a name or content string"""
+        string_id = self._string_table.get(text)
+        if string_id is None:
+            string_id = self._string_table[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
 
 @dataclass
 class RequirementAlignment:
@@ -53,10 +380,199 @@ class RequirementAlignment:
     confidence_score: float = 0.0
     notes: str = ""
     coverage_percentage: float = 0.0
+    # Computed once by RequirementMatcher and reused downstream: the
+    # requirement's keywords, plus the match score and lowercased
+    # "name content" text of each evidence item (parallel to ``evidence``)
+    keywords: List[str] = field(default_factory=list)
+    evidence_scores: List[float] = field(default_factory=list)
+    evidence_texts: List[str] = field(default_factory=list)
+
+@dataclass
+class SpecHeader:
+    """A markdown header found by SpecDocument"""
+    line_index: int   # line holding the '#' run
+    level: int        # number of '#' characters (1-3)
+    title: str
+    title_line: int   # line holding the title (after the header line if it was blank)
+
+class SpecDocument:
+    """Markdown spec split into lines and tokenized once
+    
+    Headers, section bounds and per-line lookups are all answered from
+    tables built up front, instead of re-scanning (and re-slicing) the whole
+    spec for every section and user story. Header and section rules
+    reproduce the regular expressions the extractor used before:
+    
+    - a header is a run of 1-3 '#' followed by optional whitespace (which
+      may span blank lines) and a title without '#'; the line after the
+      title must start with '#' or be the final, empty line;
+    - a section runs from the end of its title line to the end of the spec.
+      The old "next header" pattern was written as rf'\\n#{{{1,{level}}}}\\s',
+      which formats to a literal '#{1,' + level spaces + '}' marker rather
+      than a '#' run, so only a line starting with that marker (followed by
+      whitespace) ends a section early. Kept as-is so reports do not change.
+    """
+    
+    def __init__(self, content: str):
+        self.content = content
+        self.lines = content.split('\n')
+        self.line_starts = list(accumulate((len(line) + 1 for line in self.lines[:-1]), initial=0))
+        self.lower_content = content.lower()
+        
+        # Lowercasing can change line lengths, so the lowered text gets its own offsets
+        self.lower_line_starts = [0]
+        for line in self.lower_content.split('\n')[:-1]:
+            self.lower_line_starts.append(self.lower_line_starts[-1] + len(line) + 1)
+        
+        self.hash_runs = [len(line) - len(line.lstrip('#')) for line in self.lines]
+        self.headers = self._tokenize_headers()
+        self._section_markers = self._find_section_markers()
+        self._word_flags: Dict[Tuple[str, ...], List[bool]] = {}
+        # (pattern, end, search position) -> (match text, next search position), or None when exhausted
+        self._match_chains: Dict[Tuple[str, int, int], Optional[Tuple[str, int]]] = {}
+    
+    def _tokenize_headers(self) -> List[SpecHeader]:
+        """Find every header in one pass over the lines"""
+        headers = []
+        lines = self.lines
+        last = len(lines) - 1
+        
+        for i, run in enumerate(self.hash_runs):
+            if not 1 <= run <= 3:
+                continue
+            
+            # Skip whitespace after the '#' run, continuing over blank lines
+            title_line, rest = i, lines[i][run:]
+            while not rest.strip():
+                if title_line == last:
+                    break
+                title_line += 1
+                rest = lines[title_line]
+            title = rest.lstrip()
+            
+            # The title needs a following line that starts with '#' or is the empty last line
+            if not title or '#' in title or title_line == last:
+                continue
+            next_line = lines[title_line + 1]
+            if not (next_line.startswith('#') or (title_line + 1 == last and not next_line)):
+                continue
+            
+            headers.append(SpecHeader(line_index=i, level=run, title=title.strip(), title_line=title_line))
+        
+        return headers
+    
+    def _find_section_markers(self) -> List[List[int]]:
+        """For each header level, the sorted indices of lines that end a section"""
+        lines = self.lines
+        last = len(lines) - 1
+        section_markers = [[] for _ in range(4)]
+        
+        for level in range(1, 4):
+            marker = '#{1,' + ' ' * level + '}'
+            for k, line in enumerate(lines):
+                if k == 0 or not line.startswith(marker):
+                    continue
+                # The marker must be followed by whitespace (a line break counts)
+                if len(line) > len(marker):
+                    if line[len(marker)].isspace():
+                        section_markers[level].append(k)
+                elif k < last:
+                    section_markers[level].append(k)
+        
+        return section_markers
+    
+    def section_bounds(self, header: SpecHeader) -> Tuple[int, int]:
+        """Return the (start, end) offsets of a header's section body, stripped"""
+        content = self.content
+        start = self.line_starts[header.title_line] + len(self.lines[header.title_line])
+        markers = self._section_markers[header.level]
+        k = bisect_right(markers, header.title_line)
+        end = self.line_starts[markers[k]] - 1 if k < len(markers) else len(content)
+        
+        while start < end and content[start].isspace():
+            start += 1
+        while end > start and content[end - 1].isspace():
+            end -= 1
+        return start, end
+    
+    def section_text(self, header: SpecHeader) -> str:
+        """Return the stripped body of a header's section"""
+        start, end = self.section_bounds(header)
+        return self.content[start:end]
+    
+    def find_all(self, pattern: re.Pattern, start: int, end: int,
+                 seen: Optional[Set[Tuple[str, int, int]]] = None) -> List[str]:
+        """Return pattern.findall(content[start:end]) for a one-group MULTILINE pattern
+        
+        Only whitespace may precede start on its line, so '^' still matches
+        there. Sections that share an end offset are scanned once: once a
+        scan reaches a position an earlier call already searched from, the
+        remaining matches are read back from the recorded chain. Positions
+        added to ``seen`` mark matches that were already returned, so a later
+        call stops as soon as it reaches one of them.
+        """
+        chains = self._match_chains
+        position = self.line_starts[bisect_right(self.line_starts, start) - 1]
+        found = []
+        if start >= end:
+            return found
+        
+        while True:
+            key = (pattern.pattern, end, position)
+            if seen is not None:
+                if key in seen:
+                    break
+                seen.add(key)
+            
+            if key in chains:
+                link = chains[key]
+            else:
+                match = pattern.search(self.content, position, end)
+                link = (match.group(1), match.end()) if match else None
+                chains[key] = link
+            
+            if link is None:
+                break
+            found.append(link[0])
+            position = link[1]
+        
+        return found
+    
+    def lines_containing(self, text: str) -> List[int]:
+        """Return the indices of lines containing text, case-insensitively"""
+        needle = text.lower()
+        found = []
+        if not needle:
+            return list(range(len(self.lines)))
+        
+        position = self.lower_content.find(needle)
+        while position != -1:
+            line_index = bisect_right(self.lower_line_starts, position) - 1
+            found.append(line_index)
+            if line_index + 1 >= len(self.lower_line_starts):
+                break
+            position = self.lower_content.find(needle, self.lower_line_starts[line_index + 1])
+        
+        return found
+    
+    def lines_with_any(self, words: Tuple[str, ...]) -> List[bool]:
+        """Return, per line, whether its lowercased text contains any of the words"""
+        flags = self._word_flags.get(words)
+        if flags is None:
+            flags = [any(word in line for word in words) for line in self.lower_content.split('\n')]
+            self._word_flags[words] = flags
+        return flags
 
 class RequirementExtractor:
     """Extracts structured requirements from project specification documents"""
     
+    FEATURE_SECTION_KEYWORDS = [
+        'engine', 'system', 'management', 'mechanic', 'interface', 
+        'progression', 'gameplay', 'feature'
+    ]
+    TECHNICAL_DETAIL_WORDS = ('function', 'class', 'element', 'button', 'form', 'api')
+    FEATURE_PATTERN = re.compile(r'^\s*[*-]\s+(.+?)(?=\n\s*[*-]|\n\n|\Z)', re.MULTILINE | re.DOTALL)
+    
     def __init__(self, spec_files: List[str]):
         self.spec_files = spec_files
         self.requirements = []
@@ -80,6 +596,7 @@ class RequirementExtractor:
         
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
+        document = SpecDocument(content)
         
         # Extract user stories (As a... I want... so that...)
         user_story_pattern = r'(?:^|\n)\* As a ([^,]+), I (?:want to |can |need to )?([^,]+?)(?:,?\s*so that (.+?))?(?=\n|$)'
@@ -96,14 +613,17 @@ class RequirementExtractor:
                 text=user_story_text,
                 category="User Story",
                 user_story=user_story_text,
-                technical_details=self._extract_related_technical_details(content, action)
+                technical_details=self._extract_related_technical_details(document, action)
             ))
         
-        # Extract feature requirements
-        feature_sections = self._extract_feature_sections(content)
-        for section_name, section_content in feature_sections.items():
-            features = self._extract_features_from_section(section_content, section_name)
-            requirements.extend(features)
+        # Extract feature requirements. Sections overlap heavily, so a bullet
+        # that an earlier section already produced is not built again; the
+        # copy would be dropped by _deduplicate_requirements anyway.
+        feature_sections = self._extract_feature_sections(document)
+        seen_matches = set()
+        for section_name, (start, end) in feature_sections.items():
+            feature_texts = document.find_all(self.FEATURE_PATTERN, start, end, seen_matches)
+            requirements.extend(self._build_feature_requirements(feature_texts, section_name))
         
         # Extract technical requirements
         tech_requirements = self._extract_technical_requirements(content)
@@ -111,47 +631,28 @@ class RequirementExtractor:
         
         return requirements
     
-    def _extract_feature_sections(self, content: str) -> Dict[str, str]:
-        """Extract major feature sections from the specification"""
+    def _extract_feature_sections(self, document: SpecDocument) -> Dict[str, Tuple[int, int]]:
+        """Extract major feature sections from the specification, as offsets into the spec"""
         sections = {}
         
-        # Match section headers and their content
-        section_pattern = r'^(#{1,3})\s*([^#\n]+?)(?=\n(?:#{1,3}|\Z))'
-        matches = re.finditer(section_pattern, content, re.MULTILINE | re.DOTALL)
-        
-        current_section = None
-        for match in matches:
-            level = len(match.group(1))
-            title = match.group(2).strip()
-            
+        for header in document.headers:
             # Filter for relevant feature sections
-            if any(keyword in title.lower() for keyword in [
-                'engine', 'system', 'management', 'mechanic', 'interface', 
-                'progression', 'gameplay', 'feature'
-            ]):
-                # Extract the section content until next header of same or higher level
-                start_pos = match.end()
-                next_header_pattern = rf'\n#{{{1,{level}}}}\s'
-                next_match = re.search(next_header_pattern, content[start_pos:])
-                
-                if next_match:
-                    section_content = content[start_pos:start_pos + next_match.start()]
-                else:
-                    section_content = content[start_pos:]
-                
-                sections[title] = section_content.strip()
+            if any(keyword in header.title.lower() for keyword in self.FEATURE_SECTION_KEYWORDS):
+                sections[header.title] = document.section_bounds(header)
         
         return sections
     
     def _extract_features_from_section(self, section_content: str, section_name: str) -> List[RequirementSpec]:
         """Extract individual feature requirements from a section"""
-        requirements = []
-        
         # Extract bullet points as features
-        feature_pattern = r'^\s*[*-]\s+(.+?)(?=\n\s*[*-]|\n\n|\Z)'
-        features = re.findall(feature_pattern, section_content, re.MULTILINE | re.DOTALL)
+        features = self.FEATURE_PATTERN.findall(section_content)
+        return self._build_feature_requirements(features, section_name)
+    
+    def _build_feature_requirements(self, features: List[str], section_name: str) -> List[RequirementSpec]:
+        """Turn bullet point texts into feature requirements"""
+        requirements = []
         
-        for i, feature_text in enumerate(features):
+        for feature_text in features:
             feature_text = re.sub(r'\s+', ' ', feature_text.strip())
             if len(feature_text) > 10:  # Filter out very short items
                 req_id = f"FT_{hashlib.md5(f'{section_name}_{feature_text[:50]}'.encode()).hexdigest()[:8]}"
@@ -217,26 +718,22 @@ class RequirementExtractor:
         
         return keywords
     
-    def _extract_related_technical_details(self, content: str, action: str) -> List[str]:
+    def _extract_related_technical_details(self, document: SpecDocument, action: str) -> List[str]:
         """Find technical details related to a user story action"""
         details = []
         
         # Look for technical details in the same paragraph or nearby
-        action_lower = action.lower()
-        lines = content.split('\n')
-        
-        for i, line in enumerate(lines):
-            if action_lower in line.lower():
-                # Collect surrounding technical details
-                start = max(0, i - 2)
-                end = min(len(lines), i + 3)
-                context = lines[start:end]
-                
-                for ctx_line in context:
-                    if any(tech_word in ctx_line.lower() for tech_word in [
-                        'function', 'class', 'element', 'button', 'form', 'api'
-                    ]):
-                        details.append(ctx_line.strip())
+        technical_lines = document.lines_with_any(self.TECHNICAL_DETAIL_WORDS)
+        line_count = len(document.lines)
+        
+        for i in document.lines_containing(action):
+            # Collect surrounding technical details
+            start = max(0, i - 2)
+            end = min(line_count, i + 3)
+            
+            for ctx_index in range(start, end):
+                if technical_lines[ctx_index]:
+                    details.append(document.lines[ctx_index].strip())
         
         return details
     
@@ -255,102 +752,1162 @@ class RequirementExtractor:
         
         return unique_requirements
 
+@dataclass
+class FileScanStats:
+    """Counters gathered while scanning one source file"""
+    lines: int = 0
+    bytes: int = 0
+    # Lines hit by each extractor pattern, keyed by "<language>:<pattern>"
+    pattern_hits: Dict[str, int] = field(default_factory=dict)
+    # Lines left out of extraction for exceeding MAX_LINE_LENGTH
+    long_lines: int = 0
+    file_path: str = ""
+    seconds: float = 0.0
+
+class PipelineMetrics:
+    """Per-stage wall/CPU timings and counters for one pipeline run
+    
+    Stages are timed with ``stage()``; components add counters under the
+    name of the stage they run in. With a profile directory every stage is
+    also run under cProfile and its stats are written to ``<stage>.prof``.
+    """
+    
+    # Counters that are also reported per second of their stage's wall time
+    RATE_COUNTERS = ('files_scanned', 'lines_scanned', 'requirements_matched', 'candidates_scored')
+    # Number of files listed with their extraction time, slowest first
+    SLOWEST_FILES = 20
+    
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, Dict[str, float]] = {}
+        self.pattern_hits: Dict[str, int] = {}
+        self.file_seconds: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time (and optionally profile) the enclosed block as a pipeline stage"""
+        profiler = cProfile.Profile() if self.profile_dir else None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            timing = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            timing['wall_seconds'] += time.perf_counter() - wall_start
+            timing['cpu_seconds'] += time.process_time() - cpu_start
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+    
+    def count(self, stage: str, name: str, value: float = 1):
+        """Add to a stage counter"""
+        counters = self.counters.setdefault(stage, {})
+        counters[name] = counters.get(name, 0) + value
+    
+    def add_file_stats(self, stats: FileScanStats):
+        """Fold the counters of one scanned file into the analyze stage"""
+        self.count('analyze', 'files_scanned')
+        self.count('analyze', 'lines_scanned', stats.lines)
+        self.count('analyze', 'bytes_scanned', stats.bytes)
+        if stats.long_lines:
+            self.count('analyze', 'long_lines_skipped', stats.long_lines)
+        for pattern, hits in stats.pattern_hits.items():
+            self.pattern_hits[pattern] = self.pattern_hits.get(pattern, 0) + hits
+        self.file_seconds[stats.file_path] = self.file_seconds.get(stats.file_path, 0.0) + stats.seconds
+    
+    def slowest_files(self, count: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (file path, extraction seconds) of the slowest scanned files, slowest first"""
+        ranked = sorted(self.file_seconds.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:self.SLOWEST_FILES if count is None else count]
+    
+    def to_dict(self) -> Dict:
+        """Return timings, counters and derived rates per stage"""
+        stages = {}
+        for name in dict.fromkeys(list(self.stages) + list(self.counters)):
+            stage = dict(self.stages.get(name, {}))
+            stage.update(self.counters.get(name, {}))
+            wall = stage.get('wall_seconds')
+            for counter in self.RATE_COUNTERS:
+                if counter in stage and wall:
+                    stage[f"{counter}_per_second"] = stage[counter] / wall
+            stages[name] = stage
+        
+        return {'stages': stages, 'pattern_hits': dict(sorted(self.pattern_hits.items())),
+                'slowest_files': dict(self.slowest_files())}
+    
+    def write(self, json_file: str = "metrics.json", csv_file: str = "metrics.csv"):
+        """Write the metrics as JSON and as a flat stage/metric/value CSV"""
+        metrics = self.to_dict()
+        
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        
+        with open(csv_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Stage', 'Metric', 'Value'])
+            for stage, values in metrics['stages'].items():
+                for metric, value in values.items():
+                    writer.writerow([stage, metric, round(value, 6)])
+            for pattern, hits in metrics['pattern_hits'].items():
+                writer.writerow(['analyze', f"pattern_hits[{pattern}]", hits])
+            for file_path, seconds in metrics['slowest_files'].items():
+                writer.writerow(['analyze', f"file_seconds[{file_path}]", round(seconds, 6)])
+
+class EvidenceCache:
+    """Persistent per-file evidence cache keyed by path, size/mtime and content hash"""
+    
+    # Bump whenever extraction output changes so stale entries are discarded
+    CACHE_VERSION = 3
+    
+    def __init__(self, cache_dir: str = ".rtcache"):
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(cache_dir, "evidence.json")
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty = False
+    
+    def load(self) -> 'EvidenceCache':
+        """Load cache entries from disk, ignoring missing or outdated caches"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        
+        if data.get('version') == self.CACHE_VERSION:
+            self.entries = data.get('files', {})
+        return self
+    
+    def save(self):
+        """Write the cache to disk if anything changed"""
+        if not self._dirty:
+            return
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            # json.dumps() runs the C encoder in one shot; json.dump() streams through the Python one
+            f.write(json.dumps({'version': self.CACHE_VERSION, 'files': self.entries}))
+        os.replace(tmp_file, self.cache_file)
+        self._dirty = False
+    
+    def lookup(self, file_path: str) -> Optional[List[ImplementationEvidence]]:
+        """Return cached evidence for an unchanged file, or None on a miss"""
+        entry = self.entries.get(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            self.hits += 1
+            return self._decode(file_path, entry['evidence'])
+        
+        # Size or mtime changed: fall back to comparing content hashes
+        try:
+            digest = self._hash_file(file_path)
+        except OSError:
+            # Unreadable: a miss with nothing to store, so analysis reports the error
+            self.misses += 1
+            return None
+        if entry is not None and entry['sha1'] == digest:
+            entry['size'] = stat.st_size
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self._dirty = True
+            self.hits += 1
+            return self._decode(file_path, entry['evidence'])
+        
+        self._pending[file_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        self.misses += 1
+        return None
+    
+    def store(self, file_path: str, evidence: List[ImplementationEvidence]):
+        """Record freshly extracted evidence for a file seen by lookup()"""
+        pending = self._pending.pop(file_path, None)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        
+        # Skip files that changed while they were being analyzed
+        if pending is None or pending[:2] != (stat.st_size, stat.st_mtime_ns):
+            return
+        
+        self.entries[file_path] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': pending[2],
+            'evidence': [
+                [ev.line_number, ev.code_type, ev.name, ev.content, list(ev.context_span)]
+                for ev in evidence
+            ]
+        }
+        self._dirty = True
+    
+    def prune(self, file_paths: List[str]):
+        """Drop entries for files that are no longer part of the scan"""
+        keep = set(file_paths)
+        for file_path in [path for path in self.entries if path not in keep]:
+            del self.entries[file_path]
+            self._dirty = True
+    
+    def _decode(self, file_path: str, records: List[List]) -> List[ImplementationEvidence]:
+        """Rebuild evidence objects from cached records"""
+        return [
+            ImplementationEvidence(
+                file_path=file_path,
+                line_number=line_number,
+                code_type=code_type,
+                name=name,
+                content=content,
+                context_span=tuple(context_span)
+            )
+            for line_number, code_type, name, content, context_span in records
+        ]
+    
+    def _hash_file(self, file_path: str) -> str:
+        """Return the SHA-1 digest of a file's content"""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+class AlignmentCache:
+    """Persistent per-requirement alignment cache keyed by requirement and candidate evidence
+    
+    A requirement's alignment depends only on its text, category and technical
+    details and on the evidence it is a candidate for (anything else scores
+    below the relevance threshold). Entries are keyed by requirement id plus a
+    digest of those fields, and hold the fingerprint of the candidate evidence
+    (see EvidenceIndex.fingerprint) with the matches as (candidate rank, score)
+    pairs, so a hit is rebuilt against the current evidence positions.
+    """
+    
+    # Bump whenever scoring or candidate selection changes so stale entries are discarded
+    CACHE_VERSION = 1
+    
+    def __init__(self, cache_dir: str = ".rtcache"):
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(cache_dir, "alignments.json")
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._used: Set[str] = set()
+        self._dirty = False
+    
+    def load(self) -> 'AlignmentCache':
+        """Load cache entries from disk, ignoring missing or outdated caches"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        
+        if data.get('version') == self.CACHE_VERSION:
+            self.entries = data.get('requirements', {})
+        return self
+    
+    def save(self):
+        """Write the cache to disk if anything changed"""
+        if not self._dirty:
+            return
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': self.CACHE_VERSION, 'requirements': self.entries}))
+        os.replace(tmp_file, self.cache_file)
+        self._dirty = False
+    
+    @staticmethod
+    def requirement_key(requirement: RequirementSpec) -> str:
+        """Return the cache key of a requirement: its id plus a digest of the fields matching reads"""
+        fields = json.dumps([requirement.text, requirement.category, requirement.technical_details])
+        return f"{requirement.id}:{hashlib.md5(fields.encode()).hexdigest()}"
+    
+    def lookup(self, key: str, fingerprint: str, candidates: List[int]) -> Optional[List[Tuple[int, float]]]:
+        """Return the cached (evidence position, score) matches, or None on a miss"""
+        self._used.add(key)
+        entry = self.entries.get(key)
+        if entry is not None and entry['evidence'] == fingerprint:
+            self.hits += 1
+            return [(candidates[rank], score) for rank, score in entry['matches']]
+        
+        self.misses += 1
+        return None
+    
+    def store(self, key: str, fingerprint: str, candidates: List[int], matches: List[Tuple[int, float]]):
+        """Record the matches computed for a requirement over the given candidates"""
+        self._used.add(key)
+        self.entries[key] = {
+            'evidence': fingerprint,
+            'matches': [[bisect_left(candidates, idx), score] for idx, score in matches]
+        }
+        self._dirty = True
+    
+    def prune(self):
+        """Drop entries for requirements not looked up since the cache was loaded"""
+        for key in [key for key in self.entries if key not in self._used]:
+            del self.entries[key]
+            self._dirty = True
+
+class EvidenceSnapshot:
+    """Versioned binary snapshot of a requirement list and an evidence store
+    
+    Layout: an 8-byte magic, a little-endian header (format version, number
+    of EvidenceStore strings, then offset and length of every section), and
+    the sections. One UTF-8 string table holds every string, addressed by
+    character offsets; everything else is a little-endian uint32 (code types
+    uint8) column of fixed-width values referring to it. The evidence columns
+    are the EvidenceStore arrays themselves, so loading is a handful of
+    array copies out of an mmap. The stripped source lines inside each
+    file's context spans are included, so a snapshot carries everything
+    matching needs and can be used where the source tree does not exist.
+    
+    A snapshot may hold one shard of the files (see CodeAnalyzer.shard).
+    Each file keeps its position in the unsharded walk, so merge() can put
+    the shards back together in exactly the order of an unsharded scan.
+    """
+    
+    MAGIC = b'RTSNAP\r\n'
+    # Bump whenever the layout or the meaning of a section changes
+    VERSION = 2
+    SECTIONS = ('strings', 'string_offsets', 'paths', 'path_ids', 'line_numbers', 'code_types', 'name_ids',
+                'content_ids', 'context_starts', 'context_ends', 'files', 'context_lines', 'requirements',
+                'requirement_lists', 'shard')
+    HEADER = struct.Struct('<II' + 'QQ' * len(SECTIONS))
+    # Per file: path, first evidence row, end row, first context line, context line count, walk position
+    FILE_FIELDS = 6
+    # Per requirement: id, text, category, priority, user story, then the
+    # start and count of its technical details and acceptance criteria
+    REQUIREMENT_FIELDS = 9
+    
+    @classmethod
+    def write(cls, snapshot_file: str, requirements: List[RequirementSpec], evidence: EvidenceStore,
+              shard: Tuple[int, int] = (1, 1), file_ranks: Optional[Dict[str, int]] = None):
+        """Write requirements and evidence to a snapshot file
+        
+        ``file_ranks`` gives each file's walk position (see
+        CodeAnalyzer.file_ranks); by default files are ranked in evidence order.
+        """
+        if not isinstance(evidence, EvidenceStore):
+            evidence = EvidenceStore(evidence)
+        
+        # The store's own strings come first so its name/content ids stay valid
+        strings = list(evidence.strings)
+        string_ids = dict(evidence._string_table)
+        
+        def intern(text: str) -> int:
+            string_id = string_ids.get(text)
+            if string_id is None:
+                string_id = string_ids[text] = len(strings)
+                strings.append(text)
+            return string_id
+        
+        paths = array('I', (intern(path) for path in evidence.paths))
+        
+        files = array('I')
+        context_lines = array('I')
+        for rank, (file_path, (start, end)) in enumerate(evidence.file_ranges.items()):
+            if file_ranks is not None:
+                rank = file_ranks[file_path]
+            # Keep only the lines some evidence uses as context
+            lines = source_lines.get_lines(file_path)
+            wanted = [False] * len(lines)
+            for row in range(start, end):
+                for line_index in range(evidence.context_starts[row], min(evidence.context_ends[row], len(lines))):
+                    wanted[line_index] = True
+            line_count = max((i + 1 for i, keep in enumerate(wanted) if keep), default=0)
+            files.extend((intern(file_path), start, end, len(context_lines), line_count, rank))
+            context_lines.extend(intern(lines[i]) if wanted[i] else intern('') for i in range(line_count))
+        
+        records = array('I')
+        requirement_lists = array('I')
+        for requirement in requirements:
+            records.extend(intern(text) for text in (requirement.id, requirement.text, requirement.category,
+                                                     requirement.priority, requirement.user_story))
+            for items in (requirement.technical_details, requirement.acceptance_criteria):
+                records.extend((len(requirement_lists), len(items)))
+                requirement_lists.extend(intern(item) for item in items)
+        
+        string_offsets = array('I', accumulate((len(text) for text in strings), initial=0))
+        sections = {
+            'strings': ''.join(strings).encode('utf-8'),
+            'string_offsets': string_offsets,
+            'paths': paths,
+            'path_ids': evidence.path_ids,
+            'line_numbers': evidence.line_numbers,
+            'code_types': evidence.code_types,
+            'name_ids': evidence.name_ids,
+            'content_ids': evidence.content_ids,
+            'context_starts': evidence.context_starts,
+            'context_ends': evidence.context_ends,
+            'files': files,
+            'context_lines': context_lines,
+            'requirements': records,
+            'requirement_lists': requirement_lists,
+            'shard': array('I', shard),
+        }
+        
+        blobs = [cls._to_bytes(sections[name]) for name in cls.SECTIONS]
+        layout = []
+        offset = len(cls.MAGIC) + cls.HEADER.size
+        for blob in blobs:
+            layout.extend((offset, len(blob)))
+            offset += len(blob)
+        
+        tmp_file = snapshot_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(cls.MAGIC)
+            f.write(cls.HEADER.pack(cls.VERSION, len(evidence.strings), *layout))
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_file, snapshot_file)
+    
+    @classmethod
+    def load(cls, snapshot_file: str) -> Tuple[List[RequirementSpec], EvidenceStore]:
+        """Read requirements and evidence from a snapshot file
+        
+        The context lines of every file are pinned in ``source_lines``, so
+        context is served from the snapshot rather than from disk.
+        """
+        return cls.load_shard(snapshot_file)[:2]
+    
+    @classmethod
+    def merge(cls, snapshot_files: List[str]) -> Tuple[List[RequirementSpec], EvidenceStore]:
+        """Combine the shard snapshots of one scan into the requirements and evidence of the whole scan
+        
+        Every shard of the scan must be given exactly once; the files are
+        merged in walk order, so the result does not depend on the order of
+        ``snapshot_files`` and equals an unsharded scan of the same tree.
+        """
+        shards = [cls.load_shard(snapshot_file) for snapshot_file in snapshot_files]
+        counts = {shard[2][1] for shard in shards}
+        if len(counts) != 1:
+            raise ValueError("snapshots come from scans split into different numbers of shards")
+        count = counts.pop()
+        indexes = sorted(shard[2][0] for shard in shards)
+        if indexes != list(range(1, count + 1)):
+            raise ValueError(f"expected shards 1 to {count} once each, got {', '.join(map(str, indexes))}")
+        requirements = shards[0][0]
+        if any(shard[0] != requirements for shard in shards[1:]):
+            raise ValueError("snapshots were extracted from different specifications")
+        if len(shards) == 1:
+            return requirements, shards[0][1]
+        
+        files = sorted((rank, file_path, position)
+                       for position, shard in enumerate(shards)
+                       for file_path, rank in shard[3].items())
+        merged = EvidenceStore()
+        for rank, file_path, position in files:
+            merged.copy_file(shards[position][1], file_path)
+        return requirements, merged
+    
+    @classmethod
+    def load_shard(cls, snapshot_file: str) -> Tuple[List[RequirementSpec], EvidenceStore, Tuple[int, int], Dict[str, int]]:
+        """Read a snapshot together with its (index, count) shard and the walk position of each file"""
+        with open(snapshot_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(cls.MAGIC)] != cls.MAGIC or len(mapped) < len(cls.MAGIC) + cls.HEADER.size:
+                    raise ValueError(f"{snapshot_file} is not an evidence snapshot")
+                version, store_string_count = struct.unpack_from('<II', mapped, len(cls.MAGIC))
+                if version != cls.VERSION:
+                    raise ValueError(f"{snapshot_file} has snapshot version {version}, expected {cls.VERSION}")
+                layout = cls.HEADER.unpack_from(mapped, len(cls.MAGIC))[2:]
+                
+                with memoryview(mapped) as view:
+                    sections = {}
+                    for i, name in enumerate(cls.SECTIONS):
+                        offset, length = layout[2 * i], layout[2 * i + 1]
+                        if name == 'strings':
+                            sections[name] = str(view[offset:offset + length], 'utf-8')
+                        else:
+                            sections[name] = cls._from_bytes('B' if name == 'code_types' else 'I',
+                                                             view[offset:offset + length])
+        
+        text = sections['strings']
+        offsets = sections['string_offsets']
+        strings = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        
+        evidence = EvidenceStore()
+        evidence.strings = strings[:store_string_count]
+        evidence._string_table = {string: i for i, string in enumerate(evidence.strings)}
+        evidence.paths = [strings[i] for i in sections['paths']]
+        evidence._path_table = {path: i for i, path in enumerate(evidence.paths)}
+        for name in ('path_ids', 'line_numbers', 'code_types', 'name_ids', 'content_ids',
+                     'context_starts', 'context_ends'):
+            setattr(evidence, name, sections[name])
+        
+        files, context_lines = sections['files'], sections['context_lines']
+        file_ranks = {}
+        for i in range(0, len(files), cls.FILE_FIELDS):
+            path_id, start, end, line_start, line_count, rank = files[i:i + cls.FILE_FIELDS]
+            file_path = strings[path_id]
+            evidence.file_ranges[file_path] = (start, end)
+            file_ranks[file_path] = rank
+            source_lines.pin(file_path, [strings[j] for j in context_lines[line_start:line_start + line_count]])
+        
+        records, requirement_lists = sections['requirements'], sections['requirement_lists']
+        requirements = []
+        for i in range(0, len(records), cls.REQUIREMENT_FIELDS):
+            (id_id, text_id, category_id, priority_id, story_id,
+             details_start, details_count, criteria_start, criteria_count) = records[i:i + cls.REQUIREMENT_FIELDS]
+            requirements.append(RequirementSpec(
+                id=strings[id_id],
+                text=strings[text_id],
+                category=strings[category_id],
+                priority=strings[priority_id],
+                user_story=strings[story_id],
+                technical_details=[strings[j] for j in requirement_lists[details_start:details_start + details_count]],
+                acceptance_criteria=[strings[j] for j in requirement_lists[criteria_start:criteria_start + criteria_count]]
+            ))
+        
+        return requirements, evidence, tuple(sections['shard']), file_ranks
+    
+    @staticmethod
+    def _to_bytes(section) -> bytes:
+        """Serialize a section as little-endian bytes"""
+        if isinstance(section, bytes):
+            return section
+        if sys.byteorder == 'big' and section.itemsize > 1:
+            section = array(section.typecode, section)
+            section.byteswap()
+        return section.tobytes()
+    
+    @staticmethod
+    def _from_bytes(typecode: str, data: memoryview) -> array:
+        """Deserialize a little-endian section into an array"""
+        section = array(typecode)
+        section.frombytes(data)
+        if sys.byteorder == 'big' and section.itemsize > 1:
+            section.byteswap()
+        return section
+
+class AlignmentShard:
+    """Matches computed for one shard of the requirements, to be merged into the full reports
+    
+    Requirement shard K of N holds every requirement whose position modulo
+    N is K - 1. Only the (evidence position, score) matches are stored; the
+    merge rebuilds the alignments from them. Positions refer to one set of
+    requirements and evidence, identified by fingerprint(), so every shard
+    and the merge must load the same (merged) evidence snapshot.
+    """
+    
+    # Bump whenever the file layout changes
+    VERSION = 1
+    
+    @staticmethod
+    def positions(requirement_count: int, shard: Tuple[int, int]) -> range:
+        """Return the requirement positions belonging to an (index, count) shard"""
+        index, count = shard
+        return range(index - 1, requirement_count, count)
+    
+    @staticmethod
+    def fingerprint(requirements: List[RequirementSpec], evidence: List[ImplementationEvidence]) -> str:
+        """Return a digest identifying the requirements and evidence that matches refer to"""
+        digest = hashlib.md5()
+        for requirement in requirements:
+            digest.update(AlignmentCache.requirement_key(requirement).encode('utf-8') + b'\0')
+        for item in evidence:
+            digest.update(f"{item.file_path}\0{item.line_number}\0{item.code_type}\0{item.name}\0".encode('utf-8'))
+        return digest.hexdigest()
+    
+    @classmethod
+    def write(cls, shard_file: str, shard: Tuple[int, int], fingerprint: str,
+              matches: Dict[int, List[Tuple[int, float]]]):
+        """Write the matches of a shard, keyed by requirement position"""
+        data = {
+            'version': cls.VERSION,
+            'shard': list(shard),
+            'fingerprint': fingerprint,
+            'matches': [[position, [list(match) for match in top]] for position, top in sorted(matches.items())],
+        }
+        tmp_file = shard_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data))
+        os.replace(tmp_file, shard_file)
+    
+    @classmethod
+    def merge(cls, shard_files: List[str], fingerprint: str) -> Dict[int, List[Tuple[int, float]]]:
+        """Combine the matches of every shard, checking that all shards are present and agree"""
+        matches = {}
+        shards = []
+        for shard_file in shard_files:
+            with open(shard_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get('version') != cls.VERSION:
+                raise ValueError(f"{shard_file} is not an alignment shard of version {cls.VERSION}")
+            if data['fingerprint'] != fingerprint:
+                raise ValueError(f"{shard_file} was matched against different requirements or evidence")
+            shards.append(tuple(data['shard']))
+            for position, top in data['matches']:
+                matches[position] = [(idx, score) for idx, score in top]
+        
+        counts = {count for index, count in shards}
+        indexes = sorted(index for index, count in shards)
+        if len(counts) != 1 or indexes != list(range(1, max(counts) + 1)):
+            raise ValueError("alignment shards must be shards 1 to N of one split, each given once")
+        return matches
+
+class IgnoreRules:
+    """Gitignore-style rules for paths relative to a walk root
+    
+    Supports blank lines and ``#`` comments, ``!`` negation, a trailing
+    ``/`` for directory-only rules, ``*``, ``?``, ``[...]`` and ``**``.
+    A rule containing a ``/`` (other than a trailing one) is anchored to
+    the directory its ignore file lives in; any other rule matches the
+    entry name at any depth below that directory. The last matching rule
+    wins. Rules are immutable; ``extend()`` returns a new set, so each
+    directory of a walk can share its parent's rules.
+    """
+    
+    def __init__(self, rules: Tuple[Tuple[str, re.Pattern, bool, bool], ...] = ()):
+        # (base directory, pattern, negated, directories only)
+        self.rules = rules
+    
+    def extend(self, base: str, patterns: Iterable[str]) -> 'IgnoreRules':
+        """Return these rules followed by ``patterns`` relative to ``base``"""
+        rules = list(self.rules)
+        for pattern in patterns:
+            pattern = pattern.rstrip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negated = pattern.startswith('!')
+            if negated:
+                pattern = pattern[1:]
+            elif pattern.startswith('\\'):
+                pattern = pattern[1:]  # escaped leading '#' or '!'
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if not pattern:
+                continue
+            anchored = '/' in pattern
+            regex = self._translate(pattern.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            rules.append((base, re.compile(regex + r'\Z'), negated, dir_only))
+        return IgnoreRules(tuple(rules))
+    
+    def extend_from_file(self, base: str, ignore_file: str) -> 'IgnoreRules':
+        """Return these rules followed by the rules of an ignore file, if it exists"""
+        try:
+            with open(ignore_file, 'r', encoding='utf-8', errors='ignore') as f:
+                return self.extend(base, f.readlines())
+        except OSError:
+            return self
+    
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Check whether a '/'-separated path relative to the walk root is ignored"""
+        ignored = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + '/'):
+                    continue
+                relative = path[len(base) + 1:]
+            else:
+                relative = path
+            if regex.match(relative):
+                ignored = not negated
+        return ignored
+    
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate a glob into a regex where only ``**`` crosses directories"""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+            elif pattern[i] == '*':
+                parts.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                parts.append('[^/]')
+                i += 1
+            elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+                end = pattern.index(']', i + 2)
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+            else:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+        return ''.join(parts)
+
+class _CallWithBodyPattern:
+    """Linear-time stand-in for the JavaScript ``name(...) {`` pattern in ``pattern``
+    
+    The regex rescans from every ``name(`` to the next ``)``, which is
+    quadratic on lines with many open parentheses and few closing ones. The
+    ``[^)]*`` can only ever end at the first ``)`` after the opening one, and
+    every candidate starting before that ``)`` shares it, so when no ``{``
+    follows it they all fail and the search resumes after it. ``search()``
+    and ``finditer()`` return the ``name(`` part of each match, whose start
+    and group(1) equal those of the full regex match.
+    """
+    
+    pattern = r'\b(\w+)\s*\([^)]*\)\s*{'
+    CALL_PATTERN = re.compile(r'\b(\w+)\s*\(')
+    BODY_PATTERN = re.compile(r'\s*{')
+    
+    def search(self, string: str, pos: int = 0) -> Optional[re.Match]:
+        """Return the first match starting at or after pos"""
+        for match, _ in self._matches(string, pos):
+            return match
+        return None
+    
+    def finditer(self, string: str) -> Iterator[re.Match]:
+        """Yield the non-overlapping matches in string"""
+        for match, _ in self._matches(string, 0):
+            yield match
+    
+    def _matches(self, string: str, pos: int) -> Iterator[Tuple[re.Match, int]]:
+        """Yield (call match, end of the full match) for successive matches"""
+        call = self.CALL_PATTERN.search(string, pos)
+        while call:
+            close = string.find(')', call.end())
+            if close == -1:
+                return
+            body = self.BODY_PATTERN.match(string, close + 1)
+            if body:
+                yield call, body.end()
+                pos = body.end()
+            else:
+                pos = close + 1
+            call = self.CALL_PATTERN.search(string, pos)
+
 class CodeAnalyzer:
     """Analyzes codebase to extract implementation evidence"""
     
-    def __init__(self, code_directories: List[str], file_patterns: List[str] = None):
+    # Extraction patterns are compiled once. Patterns that start with \w+ can
+    # only match at the start of a word, so they are anchored there instead
+    # of being retried from every character of long identifiers.
+    JS_FUNCTION_PATTERNS = [re.compile(pattern) for pattern in [
+        r'function\s+(\w+)\s*\(',
+        r'const\s+(\w+)\s*=\s*(?:function|\([^)]*\)\s*=>)',
+        r'let\s+(\w+)\s*=\s*(?:function|\([^)]*\)\s*=>)',
+        r'\b(\w+):\s*function\s*\(',
+    ]] + [_CallWithBodyPattern()]
+    JS_CONSTANT_PATTERNS = [re.compile(pattern) for pattern in [
+        r'const\s+([A-Z_][A-Z0-9_]*)\s*=',
+        r'let\s+([a-zA-Z_]\w*)',
+        r'var\s+([a-zA-Z_]\w*)'
+    ]]
+    JS_SELECTOR_PATTERNS = [re.compile(pattern) for pattern in [
+        r'getElementById\([\'"]([^\'"]+)[\'"]\)',
+        r'querySelector\([\'"]([^\'"]+)[\'"]\)',
+        r'getElementsByClassName\([\'"]([^\'"]+)[\'"]\)',
+    ]]
+    HTML_ID_PATTERN = re.compile(r'<(\w+)[^>]*id=[\'"]([^\'"]+)[\'"][^>]*>')
+    HTML_CLASS_PATTERN = re.compile(r'<(\w+)[^>]*class=[\'"]([^\'"]+)[\'"][^>]*>')
+    # A selector starts at a '.'/'#' or at the start of a [\w-] run
+    CSS_SELECTOR_PATTERN = re.compile(r'(?:(?<![\w-])|(?=[.#]))([.#]?[\w-]+)\s*{')
+    PY_FUNCTION_PATTERN = re.compile(r'def\s+(\w+)\s*\(')
+    PY_CLASS_PATTERN = re.compile(r'class\s+(\w+)\s*(?:\([^)]*\))?:')
+    
+    # All patterns of a language, scanned over the whole file buffer to find
+    # the lines worth running the per-line extractor on
+    JS_PATTERNS = JS_FUNCTION_PATTERNS + JS_CONSTANT_PATTERNS + JS_SELECTOR_PATTERNS
+    HTML_PATTERNS = [HTML_ID_PATTERN, HTML_CLASS_PATTERN]
+    CSS_PATTERNS = [CSS_SELECTOR_PATTERN]
+    PY_PATTERNS = [PY_FUNCTION_PATTERN, PY_CLASS_PATTERN]
+    PATTERN_LANGUAGES = {
+        pattern: language
+        for language, patterns in (('js', JS_PATTERNS), ('html', HTML_PATTERNS), ('css', CSS_PATTERNS), ('py', PY_PATTERNS))
+        for pattern in patterns
+    }
+    
+    # Pruned from every walk unless re-included with a '!' exclude rule
+    DEFAULT_EXCLUDES = ['.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.rtcache/',
+                        '*.min.js', '*.min.css']
+    # Read in every walked directory, with gitignore semantics
+    IGNORE_FILES = ('.gitignore', '.rtignore')
+    DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+    # Files are sniffed from their first block: a NUL byte marks binary
+    # content, and an average line longer than this marks minified code
+    SNIFF_BYTES = 8192
+    MINIFIED_LINE_LENGTH = 300
+    
+    def __init__(self, code_directories: List[str], file_patterns: List[str] = None, jobs: int = 1,
+                 cache: Optional[EvidenceCache] = None, metrics: Optional[PipelineMetrics] = None,
+                 exclude: Optional[List[str]] = None, use_ignore_files: bool = True,
+                 max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                 shard: Optional[Tuple[int, int]] = None):
         self.code_directories = code_directories
         self.file_patterns = file_patterns or ['*.js', '*.html', '*.css', '*.py', '*.md']
-        self.evidence = []
+        self.jobs = jobs
+        self.cache = cache
+        self.metrics = metrics
+        self.exclude_rules = IgnoreRules().extend('', self.DEFAULT_EXCLUDES + list(exclude or []))
+        self.use_ignore_files = use_ignore_files
+        self.max_file_size = max_file_size
+        # (index, count), 1-based: only files with shard_of(path, count) == index are analyzed
+        self.shard = shard
+        self.evidence = EvidenceStore()
+        self.skipped_files: Dict[str, str] = {}
+        # Position of each collected file in the walk order of an unsharded run
+        self.file_ranks: Dict[str, int] = {}
+        self._walked = 0
+        self._file_pattern = re.compile('|'.join(fnmatch.translate(pattern) for pattern in self.file_patterns))
+        self._sniffed: Dict[str, Tuple[int, int, Optional[str]]] = {}
     
-    def analyze_codebase(self) -> List[ImplementationEvidence]:
+    def analyze_codebase(self, file_paths: Optional[List[str]] = None) -> EvidenceStore:
         """Analyze the codebase and extract implementation evidence"""
-        evidence = []
+        if file_paths is None:
+            file_paths = self.collect_files()
+        
+        evidence = self._analyze_files(file_paths)
         
-        for directory in self.code_directories:
-            if os.path.exists(directory):
-                evidence.extend(self._analyze_directory(directory))
+        if self.cache is not None:
+            self.cache.prune(file_paths)
+            self.cache.save()
         
         self.evidence = evidence
         return evidence
     
-    def _analyze_directory(self, directory: str) -> List[ImplementationEvidence]:
+    def collect_files(self) -> List[str]:
+        """List every analyzable file under the code directories in walk order"""
+        file_paths = []
+        visited = set()
+        self.skipped_files = {}
+        self.file_ranks = {}
+        self._walked = 0
+        
+        for directory in self._normalize_roots(self.code_directories):
+            file_paths.extend(self._collect_files(directory, visited))
+        
+        return file_paths
+    
+    def _analyze_directory(self, directory: str) -> EvidenceStore:
         """Analyze all files in a directory"""
-        evidence = []
+        return self._analyze_files(self._collect_files(directory))
+    
+    @staticmethod
+    def shard_of(relative_path: str, count: int) -> int:
+        """Return the 1-based shard of ``count`` that a file is assigned to
+        
+        The assignment hashes the '/'-separated path relative to its scan
+        root, so it is the same on every machine and in every checkout.
+        """
+        digest = hashlib.md5(relative_path.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') % count + 1
+    
+    def _normalize_roots(self, directories: List[str]) -> List[str]:
+        """Drop missing roots and roots already covered by another root
+        
+        A root inside another root is only dropped when the other root's walk
+        descends into it. A root below an excluded or ignored directory (say
+        node_modules/pkg next to .) is kept; files reached both ways are
+        still analyzed once thanks to the visited set.
+        """
+        existing = [d for d in directories if os.path.exists(d)]
+        real_roots = [os.path.realpath(d) for d in existing]
+        roots = []
+        
+        for i, (directory, real_root) in enumerate(zip(existing, real_roots)):
+            # A root is redundant if it repeats an earlier root or another root's walk covers it
+            duplicate = real_root in real_roots[:i]
+            nested = any(
+                other != real_root and os.path.commonpath([other, real_root]) == other
+                and self._walk_reaches(other, real_root)
+                for other in real_roots
+            )
+            if not duplicate and not nested:
+                roots.append(directory)
+        
+        return roots
+    
+    def _walk_reaches(self, root: str, directory: str) -> bool:
+        """Check whether walking ``root`` descends into ``directory``, a real path below it
+        
+        Applies the same exclude and ignore file rules as _collect_files() to
+        every directory on the way down.
+        """
+        ignore_rules = IgnoreRules()
+        current = root
+        relative = ''
+        for part in os.path.relpath(directory, root).split(os.sep):
+            if self.use_ignore_files:
+                for ignore_file in self.IGNORE_FILES:
+                    ignore_path = os.path.join(current, ignore_file)
+                    if os.path.isfile(ignore_path):
+                        ignore_rules = ignore_rules.extend_from_file(relative, ignore_path)
+            rules = IgnoreRules(ignore_rules.rules + self.exclude_rules.rules)
+            relative = relative + '/' + part if relative else part
+            if rules.ignored(relative, is_dir=True):
+                return False
+            current = os.path.join(current, part)
+        return True
+    
+    def _collect_files(self, directory: str, visited: Optional[Set[Tuple[int, int]]] = None) -> List[str]:
+        """List the analyzable files under a directory in walk order
+        
+        Files whose device/inode pair is already in ``visited`` (symlinks,
+        hard links or overlapping roots) are skipped so each file is analyzed
+        exactly once. Excluded and ignored directories are pruned during the
+        walk, so nothing below them is listed. Oversized, binary and minified
+        files are left out and recorded in ``skipped_files`` with the reason.
+        
+        With a shard set, every shard still walks the whole tree, so all of
+        them agree on which path of a multiply linked file is kept and on
+        the walk order recorded in ``file_ranks``; only files of this shard
+        are listed, sniffed and analyzed.
+        """
+        file_paths = []
+        if visited is None:
+            visited = set()
+        # Ignore file rules inherited by each directory still to be walked
+        ignore_rules_by_dir = {directory: IgnoreRules()}
         
         for root, dirs, files in os.walk(directory):
+            ignore_rules = ignore_rules_by_dir.pop(root)
+            relative_root = os.path.relpath(root, directory).replace(os.sep, '/')
+            if relative_root == '.':
+                relative_root = ''
+            prefix = relative_root + '/' if relative_root else ''
+            
+            if self.use_ignore_files:
+                for ignore_file in self.IGNORE_FILES:
+                    if ignore_file in files:
+                        ignore_rules = ignore_rules.extend_from_file(relative_root, os.path.join(root, ignore_file))
+            # Explicit excludes come last, so they (and their '!' re-includes) override ignore files
+            rules = IgnoreRules(ignore_rules.rules + self.exclude_rules.rules) if ignore_rules.rules else self.exclude_rules
+            
+            dirs[:] = [d for d in dirs if not rules.ignored(prefix + d, is_dir=True)]
+            for d in dirs:
+                ignore_rules_by_dir[os.path.join(root, d)] = ignore_rules
+            
             for file in files:
-                if self._should_analyze_file(file):
-                    file_path = os.path.join(root, file)
-                    try:
-                        file_evidence = self._analyze_file(file_path)
-                        evidence.extend(file_evidence)
-                    except Exception as e:
-                        print(f"Error analyzing {file_path}: {e}")
+                if not self._should_analyze_file(file) or rules.ignored(prefix + file):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                file_key = (stat.st_dev, stat.st_ino)
+                if file_key in visited:
+                    continue
+                visited.add(file_key)
+                rank = self._walked
+                self._walked += 1
+                if self.shard is not None and self.shard_of(prefix + file, self.shard[1]) != self.shard[0]:
+                    continue
+                
+                skip_reason = self._skip_reason(file_path, stat)
+                if skip_reason is not None:
+                    self.skipped_files[file_path] = skip_reason
+                    continue
+                self.file_ranks[file_path] = rank
+                file_paths.append(file_path)
+        
+        return file_paths
+    
+    def _skip_reason(self, file_path: str, stat: os.stat_result) -> Optional[str]:
+        """Return why a file should not be analyzed ('size', 'binary' or 'minified'), or None"""
+        if self.max_file_size is not None and stat.st_size > self.max_file_size:
+            return 'size'
+        
+        # Sniffing reads the file, so the verdict is kept until the file changes
+        sniffed = self._sniffed.get(file_path)
+        if sniffed is not None and sniffed[:2] == (stat.st_size, stat.st_mtime_ns):
+            return sniffed[2]
         
+        try:
+            with open(file_path, 'rb') as f:
+                sample = f.read(self.SNIFF_BYTES)
+        except OSError:
+            return None
+        
+        reason = None
+        if b'\0' in sample:
+            reason = 'binary'
+        elif len(sample) >= 1024 and len(sample) / (sample.count(b'\n') + 1) > self.MINIFIED_LINE_LENGTH:
+            reason = 'minified'
+        self._sniffed[file_path] = (stat.st_size, stat.st_mtime_ns, reason)
+        return reason
+    
+    def _analyze_files(self, file_paths: List[str]) -> EvidenceStore:
+        """Analyze files serially or across worker processes, keeping input order"""
+        evidence = EvidenceStore()
+        for file_path, file_evidence in self.iter_file_evidence(file_paths):
+            evidence.add_file(file_path, file_evidence)
         return evidence
     
+    def iter_file_evidence(self, file_paths: List[str]) -> Iterator[Tuple[str, List[ImplementationEvidence]]]:
+        """Yield (file path, evidence) for each file in input order, as soon as it is analyzed"""
+        cached_results = {}
+        
+        # Serve unchanged files from the cache and only parse the rest
+        pending_paths = []
+        for file_path in file_paths:
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.lookup(file_path)
+            if cached is not None:
+                cached_results[file_path] = cached
+            else:
+                pending_paths.append(file_path)
+        
+        executor = None
+        if self.jobs > 1 and len(pending_paths) > 1:
+            chunksize = max(1, len(pending_paths) // (self.jobs * 4))
+            executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_analyzer_worker,
+                                           initargs=(self.code_directories, self.file_patterns))
+            analyzed = executor.map(_analyze_file_task, pending_paths, chunksize=chunksize)
+        else:
+            analyzed = map(self._analyze_file_safely, pending_paths)
+        
+        # executor.map yields in submission order, so the merge is deterministic;
+        # per-file lists are handed on as soon as they arrive
+        try:
+            for file_path in file_paths:
+                file_evidence = cached_results.pop(file_path, None)
+                if file_evidence is None:
+                    file_evidence, error, stats = next(analyzed)
+                    if error is not None:
+                        print(f"Error analyzing {file_path}: {error}")
+                    elif self.cache is not None:
+                        self.cache.store(file_path, file_evidence)
+                    if self.metrics is not None:
+                        self.metrics.add_file_stats(stats)
+                elif self.metrics is not None:
+                    self.metrics.count('analyze', 'files_cached')
+                yield file_path, file_evidence
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    
+    def _analyze_file_safely(self, file_path: str) -> Tuple[List[ImplementationEvidence], Optional[str], FileScanStats]:
+        """Analyze a file, returning the error message instead of raising"""
+        stats = FileScanStats(file_path=file_path)
+        start = time.perf_counter()
+        try:
+            return self._analyze_file(file_path, stats), None, stats
+        except Exception as e:
+            return [], str(e), stats
+        finally:
+            stats.seconds = time.perf_counter() - start
+    
     def _should_analyze_file(self, filename: str) -> bool:
-        """Check if a file should be analyzed based on patterns"""
-        if any(filename.endswith(ext) for ext in ['.js', '.html', '.css', '.py']):
-            return True
-        return False
+        """Check if a file matches the file patterns and has an extractor"""
+        return self._file_pattern.match(filename) is not None and self._get_extractor(filename) is not None
     
-    def _analyze_file(self, file_path: str) -> List[ImplementationEvidence]:
+    def _analyze_file(self, file_path: str, stats: Optional[FileScanStats] = None) -> List[ImplementationEvidence]:
         """Analyze a single file for implementation evidence"""
         evidence = []
         
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-        except Exception:
+        extractor = self._get_extractor(file_path)
+        if extractor is None:
             return evidence
         
-        for i, line in enumerate(lines):
-            line_evidence = self._analyze_line(file_path, i + 1, line, lines)
-            evidence.extend(line_evidence)
+        # Read errors propagate, so _analyze_file_safely() reports them
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.readlines()
+        
+        patterns, extract = extractor
+        stripped_lines = [line.strip() for line in lines]
+        
+        # Overlong lines are blanked out, so neither the patterns nor the
+        # context of nearby evidence ever see them
+        searchable_lines = lines
+        long_lines = [i for i, line in enumerate(lines) if len(line) > MAX_LINE_LENGTH]
+        if long_lines:
+            searchable_lines = list(lines)
+            for i in long_lines:
+                searchable_lines[i] = '\n'
+                stripped_lines[i] = ''
+        
+        pattern_hits = None
+        if stats is not None:
+            stats.lines = len(lines)
+            stats.bytes = sum(len(line) for line in lines)
+            stats.long_lines = len(long_lines)
+            pattern_hits = stats.pattern_hits
+        
+        for line_index in self._candidate_lines(patterns, searchable_lines, pattern_hits):
+            evidence.extend(extract(file_path, line_index + 1, lines[line_index], stripped_lines))
+        
+        # Keep the lines around so context for this file is served without a re-read
+        if evidence:
+            source_lines.put(file_path, stripped_lines)
         
         return evidence
     
-    def _analyze_line(self, file_path: str, line_num: int, line: str, all_lines: List[str]) -> List[ImplementationEvidence]:
-        """Analyze a single line for implementation evidence"""
-        evidence = []
-        line_strip = line.strip()
-        
+    def _get_extractor(self, file_path: str) -> Optional[Tuple[List[re.Pattern], Callable]]:
+        """Return the patterns and line extractor for a file's language"""
         # JavaScript function definitions
         if file_path.endswith('.js'):
-            evidence.extend(self._extract_js_evidence(file_path, line_num, line, all_lines))
+            return self.JS_PATTERNS, self._extract_js_evidence
         
         # HTML elements and selectors
         elif file_path.endswith('.html'):
-            evidence.extend(self._extract_html_evidence(file_path, line_num, line, all_lines))
+            return self.HTML_PATTERNS, self._extract_html_evidence
         
         # CSS selectors and classes
         elif file_path.endswith('.css'):
-            evidence.extend(self._extract_css_evidence(file_path, line_num, line, all_lines))
+            return self.CSS_PATTERNS, self._extract_css_evidence
         
         # Python functions and classes
         elif file_path.endswith('.py'):
-            evidence.extend(self._extract_python_evidence(file_path, line_num, line, all_lines))
+            return self.PY_PATTERNS, self._extract_python_evidence
         
-        return evidence
+        return None
     
-    def _extract_js_evidence(self, file_path: str, line_num: int, line: str, all_lines: List[str]) -> List[ImplementationEvidence]:
+    def _candidate_lines(self, patterns: List[re.Pattern], lines: List[str],
+                         pattern_hits: Optional[Dict[str, int]] = None) -> List[int]:
+        """Return the indices of lines any of the patterns can match, in order
+        
+        Each pattern is searched over the whole file buffer, which lets the
+        regex engine skip ahead on literal prefixes instead of being invoked
+        once per line. A hit may span lines (a false positive for its first
+        line, which the per-line extractor then rejects), but the search
+        always resumes at the next line start, so no matching line is missed.
+        The number of lines each pattern hits is added to ``pattern_hits``.
+        """
+        content = ''.join(lines)
+        line_starts = list(accumulate((len(line) for line in lines[:-1]), initial=0))
+        candidates = set()
+        
+        for pattern in patterns:
+            hits = 0
+            match = pattern.search(content)
+            while match:
+                hits += 1
+                line_index = bisect_right(line_starts, match.start()) - 1
+                candidates.add(line_index)
+                if line_index + 1 >= len(line_starts):
+                    break
+                match = pattern.search(content, line_starts[line_index + 1])
+            if pattern_hits is not None and hits:
+                key = f"{self.PATTERN_LANGUAGES[pattern]}:{pattern.pattern}"
+                pattern_hits[key] = pattern_hits.get(key, 0) + hits
+        
+        return sorted(candidates)
+    
+    def _extract_js_evidence(self, file_path: str, line_num: int, line: str, stripped_lines: List[str]) -> List[ImplementationEvidence]:
         """Extract JavaScript implementation evidence"""
         evidence = []
-        line_strip = line.strip()
+        line_strip = stripped_lines[line_num - 1]
         
         # Function declarations
-        func_patterns = [
-            r'function\s+(\w+)\s*\(',
-            r'const\s+(\w+)\s*=\s*(?:function|\([^)]*\)\s*=>)',
-            r'let\s+(\w+)\s*=\s*(?:function|\([^)]*\)\s*=>)',
-            r'(\w+):\s*function\s*\(',
-            r'(\w+)\s*\([^)]*\)\s*{',
-        ]
-        
-        for pattern in func_patterns:
-            matches = re.finditer(pattern, line)
+        for pattern in self.JS_FUNCTION_PATTERNS:
+            matches = pattern.finditer(line)
             for match in matches:
                 func_name = match.group(1)
                 evidence.append(ImplementationEvidence(
@@ -359,18 +1916,12 @@ class CodeAnalyzer:
                     code_type='function',
                     name=func_name,
                     content=line_strip,
-                    context_lines=self._get_context_lines(all_lines, line_num, 2)
+                    context_span=self._get_context_span(len(stripped_lines), line_num, 2)
                 ))
         
         # Constants and variables
-        const_patterns = [
-            r'const\s+([A-Z_][A-Z0-9_]*)\s*=',
-            r'let\s+([a-zA-Z_]\w*)',
-            r'var\s+([a-zA-Z_]\w*)'
-        ]
-        
-        for pattern in const_patterns:
-            matches = re.finditer(pattern, line)
+        for pattern in self.JS_CONSTANT_PATTERNS:
+            matches = pattern.finditer(line)
             for match in matches:
                 var_name = match.group(1)
                 evidence.append(ImplementationEvidence(
@@ -379,18 +1930,12 @@ class CodeAnalyzer:
                     code_type='constant' if var_name.isupper() else 'variable',
                     name=var_name,
                     content=line_strip,
-                    context_lines=self._get_context_lines(all_lines, line_num, 1)
+                    context_span=self._get_context_span(len(stripped_lines), line_num, 1)
                 ))
         
         # Event listeners and DOM selectors
-        selector_patterns = [
-            r'getElementById\([\'"]([^\'"]+)[\'"]\)',
-            r'querySelector\([\'"]([^\'"]+)[\'"]\)',
-            r'getElementsByClassName\([\'"]([^\'"]+)[\'"]\)',
-        ]
-        
-        for pattern in selector_patterns:
-            matches = re.finditer(pattern, line)
+        for pattern in self.JS_SELECTOR_PATTERNS:
+            matches = pattern.finditer(line)
             for match in matches:
                 selector = match.group(1)
                 evidence.append(ImplementationEvidence(
@@ -399,18 +1944,18 @@ class CodeAnalyzer:
                     code_type='selector',
                     name=selector,
                     content=line_strip,
-                    context_lines=self._get_context_lines(all_lines, line_num, 1)
+                    context_span=self._get_context_span(len(stripped_lines), line_num, 1)
                 ))
         
         return evidence
     
-    def _extract_html_evidence(self, file_path: str, line_num: int, line: str, all_lines: List[str]) -> List[ImplementationEvidence]:
+    def _extract_html_evidence(self, file_path: str, line_num: int, line: str, stripped_lines: List[str]) -> List[ImplementationEvidence]:
         """Extract HTML implementation evidence"""
         evidence = []
+        line_strip = stripped_lines[line_num - 1]
         
         # HTML elements with IDs
-        id_pattern = r'<(\w+)[^>]*id=[\'"]([^\'"]+)[\'"][^>]*>'
-        matches = re.finditer(id_pattern, line)
+        matches = self.HTML_ID_PATTERN.finditer(line)
         for match in matches:
             element_type = match.group(1)
             element_id = match.group(2)
@@ -419,13 +1964,12 @@ class CodeAnalyzer:
                 line_number=line_num,
                 code_type='selector',
                 name=element_id,
-                content=line.strip(),
-                context_lines=self._get_context_lines(all_lines, line_num, 1)
+                content=line_strip,
+                context_span=self._get_context_span(len(stripped_lines), line_num, 1)
             ))
         
         # HTML elements with classes
-        class_pattern = r'<(\w+)[^>]*class=[\'"]([^\'"]+)[\'"][^>]*>'
-        matches = re.finditer(class_pattern, line)
+        matches = self.HTML_CLASS_PATTERN.finditer(line)
         for match in matches:
             element_type = match.group(1)
             classes = match.group(2).split()
@@ -435,19 +1979,18 @@ class CodeAnalyzer:
                     line_number=line_num,
                     code_type='selector',
                     name=class_name,
-                    content=line.strip(),
-                    context_lines=self._get_context_lines(all_lines, line_num, 1)
+                    content=line_strip,
+                    context_span=self._get_context_span(len(stripped_lines), line_num, 1)
                 ))
         
         return evidence
     
-    def _extract_css_evidence(self, file_path: str, line_num: int, line: str, all_lines: List[str]) -> List[ImplementationEvidence]:
+    def _extract_css_evidence(self, file_path: str, line_num: int, line: str, stripped_lines: List[str]) -> List[ImplementationEvidence]:
         """Extract CSS implementation evidence"""
         evidence = []
         
         # CSS class and ID selectors
-        selector_pattern = r'([.#]?[\w-]+)\s*{'
-        matches = re.finditer(selector_pattern, line)
+        matches = self.CSS_SELECTOR_PATTERN.finditer(line)
         for match in matches:
             selector = match.group(1)
             evidence.append(ImplementationEvidence(
@@ -455,19 +1998,19 @@ class CodeAnalyzer:
                 line_number=line_num,
                 code_type='selector',
                 name=selector,
-                content=line.strip(),
-                context_lines=self._get_context_lines(all_lines, line_num, 1)
+                content=stripped_lines[line_num - 1],
+                context_span=self._get_context_span(len(stripped_lines), line_num, 1)
             ))
         
         return evidence
     
-    def _extract_python_evidence(self, file_path: str, line_num: int, line: str, all_lines: List[str]) -> List[ImplementationEvidence]:
+    def _extract_python_evidence(self, file_path: str, line_num: int, line: str, stripped_lines: List[str]) -> List[ImplementationEvidence]:
         """Extract Python implementation evidence"""
         evidence = []
+        line_strip = stripped_lines[line_num - 1]
         
         # Function definitions
-        func_pattern = r'def\s+(\w+)\s*\('
-        matches = re.finditer(func_pattern, line)
+        matches = self.PY_FUNCTION_PATTERN.finditer(line)
         for match in matches:
             func_name = match.group(1)
             evidence.append(ImplementationEvidence(
@@ -475,13 +2018,12 @@ class CodeAnalyzer:
                 line_number=line_num,
                 code_type='function',
                 name=func_name,
-                content=line.strip(),
-                context_lines=self._get_context_lines(all_lines, line_num, 2)
+                content=line_strip,
+                context_span=self._get_context_span(len(stripped_lines), line_num, 2)
             ))
         
         # Class definitions
-        class_pattern = r'class\s+(\w+)\s*(?:\([^)]*\))?:'
-        matches = re.finditer(class_pattern, line)
+        matches = self.PY_CLASS_PATTERN.finditer(line)
         for match in matches:
             class_name = match.group(1)
             evidence.append(ImplementationEvidence(
@@ -489,61 +2031,612 @@ class CodeAnalyzer:
                 line_number=line_num,
                 code_type='class',
                 name=class_name,
-                content=line.strip(),
-                context_lines=self._get_context_lines(all_lines, line_num, 2)
+                content=line_strip,
+                context_span=self._get_context_span(len(stripped_lines), line_num, 2)
             ))
         
         return evidence
     
-    def _get_context_lines(self, all_lines: List[str], line_num: int, context_size: int = 2) -> List[str]:
-        """Get context lines around the current line"""
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _get_context_span(line_count: int, line_num: int, context_size: int = 2) -> Tuple[int, int]:
+        """Get the span of context lines around the current line (shared per line)"""
         start = max(0, line_num - context_size - 1)
-        end = min(len(all_lines), line_num + context_size)
-        return [line.strip() for line in all_lines[start:end]]
+        end = min(line_count, line_num + context_size)
+        return (start, end)
+
+_worker_analyzer: Optional[CodeAnalyzer] = None
+
+def _init_analyzer_worker(code_directories: List[str], file_patterns: List[str]):
+    """Create the per-process analyzer used by parallel scans"""
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzer(code_directories, file_patterns)
+
+def _analyze_file_task(file_path: str) -> Tuple[List[ImplementationEvidence], Optional[str], FileScanStats]:
+    """Process-pool entry point for analyzing a single file"""
+    return _worker_analyzer._analyze_file_safely(file_path)
+
+@lru_cache(maxsize=65536)
+def _word_set(text: str) -> frozenset:
+    """Return the set of 3+ letter words in text, as used for name similarity"""
+    return frozenset(re.findall(r'\b[a-zA-Z]{3,}\b', text.lower()))
+
+class EvidenceIndex:
+    """Inverted index over evidence text used to preselect scoring candidates
+    
+    Keywords are matched as substrings of the lowercased evidence text, so the
+    index is keyed by character trigrams: any text containing a keyword also
+    contains every trigram of it. Evidence names are additionally indexed by
+    the words used for name similarity. Verified keyword occurrences are
+    cached per keyword, so a keyword shared by many requirements is only
+    searched for once, and a requirement's keyword hits against every piece of
+    evidence come from merging those lists rather than testing each keyword
+    against each text.
+    
+    An index can be derived from the index of an earlier evidence list by
+    passing ``previous=(index, position_map)``, where ``position_map[old]`` is
+    the new position of a carried-over item or -1 if it was dropped. Carried
+    items keep their texts and postings; only the remaining items are indexed.
+    """
+    
+    def __init__(self, evidence: List[ImplementationEvidence],
+                 previous: Optional[Tuple['EvidenceIndex', List[int]]] = None):
+        self.evidence = evidence
+        self.evidence_texts: List[str] = [None] * len(evidence)
+        self.context_texts: List[str] = [None] * len(evidence)
+        self.trigram_postings: Dict[str, List[int]] = {}
+        self.name_word_postings: Dict[str, List[int]] = {}
+        self._keyword_cache: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._digests: List[Optional[bytes]] = [None] * len(evidence)
+        if previous is None:
+            self._build(range(len(evidence)))
+        else:
+            self._build(self._carry_over(*previous))
+    
+    def update(self):
+        """Index evidence appended to the evidence list since the index was built"""
+        start = len(self.evidence_texts)
+        added = len(self.evidence) - start
+        if added <= 0:
+            return
+        
+        self.evidence_texts.extend([None] * added)
+        self.context_texts.extend([None] * added)
+        self._digests.extend([None] * added)
+        # Cached keyword occurrences do not cover the new evidence
+        self._keyword_cache.clear()
+        self._build(range(start, len(self.evidence)))
+    
+    def _carry_over(self, index: 'EvidenceIndex', position_map: List[int]) -> List[int]:
+        """Copy texts and remapped postings from an earlier index, returning the positions left to index"""
+        for old, new in enumerate(position_map):
+            if new >= 0:
+                self.evidence_texts[new] = index.evidence_texts[old]
+                self.context_texts[new] = index.context_texts[old]
+                self._digests[new] = index._digests[old]
+        
+        # Postings no longer come out in ascending order, which is fine:
+        # candidates() sorts its result and nothing else relies on the order
+        for target, source in ((self.trigram_postings, index.trigram_postings),
+                               (self.name_word_postings, index.name_word_postings)):
+            for key, postings in source.items():
+                remapped = [position_map[idx] for idx in postings if position_map[idx] >= 0]
+                if remapped:
+                    target[key] = remapped
+        
+        return [idx for idx, text in enumerate(self.evidence_texts) if text is None]
+    
+    def _build(self, positions):
+        """Index evidence text, context and name words by evidence position"""
+        trigram_cache: Dict[str, Set[str]] = {}
+        
+        for idx in positions:
+            evidence = self.evidence[idx]
+            evidence_text = f"{evidence.name} {evidence.content}".lower()
+            context_text = ' '.join(evidence.context_lines).lower()
+            self.evidence_texts[idx] = evidence_text
+            self.context_texts[idx] = context_text
+            
+            grams = set()
+            for text in (evidence_text, context_text):
+                text_grams = trigram_cache.get(text)
+                if text_grams is None:
+                    text_grams = {text[i:i + 3] for i in range(len(text) - 2)}
+                    trigram_cache[text] = text_grams
+                grams |= text_grams
+            
+            for gram in grams:
+                self.trigram_postings.setdefault(gram, []).append(idx)
+            
+            for word in set(re.findall(r'\b[a-zA-Z]{3,}\b', evidence.name.lower())):
+                self.name_word_postings.setdefault(word, []).append(idx)
+    
+    def keyword_occurrences(self, keyword: str) -> Tuple[List[int], List[int]]:
+        """Return the evidence positions whose text, and those whose context, contain the keyword"""
+        occurrences = self._keyword_cache.get(keyword)
+        if occurrences is not None:
+            return occurrences
+        
+        # Start from the rarest trigram of the keyword, then verify substrings
+        rarest = None
+        for i in range(len(keyword) - 2):
+            gram_postings = self.trigram_postings.get(keyword[i:i + 3])
+            if gram_postings is None:
+                # A missing trigram means no evidence can contain the keyword
+                rarest = []
+                break
+            if rarest is None or len(gram_postings) < len(rarest):
+                rarest = gram_postings
+        
+        rarest = rarest or []
+        occurrences = (
+            [idx for idx in rarest if keyword in self.evidence_texts[idx]],
+            [idx for idx in rarest if keyword in self.context_texts[idx]],
+        )
+        
+        self._keyword_cache[keyword] = occurrences
+        return occurrences
+    
+    def keyword_hits(self, keywords: List[str]) -> Tuple[Counter, Counter]:
+        """Count, per evidence position, how many keywords its text and its context contain
+        
+        Equivalent to ``sum(keyword in text for keyword in keywords)`` for every
+        piece of evidence; positions without hits are simply absent (zero).
+        """
+        occurrences = [self.keyword_occurrences(keyword) for keyword in keywords]
+        text_hits = Counter(chain.from_iterable(text for text, context in occurrences))
+        context_hits = Counter(chain.from_iterable(context for text, context in occurrences))
+        return text_hits, context_hits
+    
+    def fingerprint(self, positions: List[int]) -> str:
+        """Return a digest of everything scoring reads from the evidence at the given positions
+        
+        Covers each item's code type, name and content, and context text, in
+        the order given, which for candidates is evidence order and therefore
+        decides score ties. File paths and line numbers are left out: moving
+        evidence does not change how it scores.
+        """
+        digests = self._digests
+        for idx in positions:
+            if digests[idx] is None:
+                evidence = self.evidence[idx]
+                digests[idx] = hashlib.md5('\0'.join(
+                    (evidence.code_type, evidence.name, self.evidence_texts[idx], self.context_texts[idx])
+                ).encode()).digest()
+        return hashlib.md5(b''.join(digests[idx] for idx in positions)).hexdigest()
+    
+    def candidates(self, keywords: List[str], requirement_words: Set[str]) -> List[int]:
+        """Return evidence positions sharing a keyword or name word, in evidence order"""
+        candidate_ids = set()
+        
+        for keyword in keywords:
+            text_postings, context_postings = self.keyword_occurrences(keyword)
+            candidate_ids.update(text_postings)
+            candidate_ids.update(context_postings)
+        
+        for word in requirement_words:
+            candidate_ids.update(self.name_word_postings.get(word, ()))
+        
+        return sorted(candidate_ids)
+
+class VectorizedScorer:
+    """Batched numpy version of RequirementMatcher._calculate_evidence_score
+    
+    Each batch of requirements is scored against all evidence at once: keyword
+    and context hits and shared name words are requirement x evidence count
+    matrices (sparse products when scipy is installed), and type relevance is a
+    lookup table indexed by requirement category and evidence code type. The
+    weighted terms are combined in the same order as the scalar scorer, so the
+    scores are bit-for-bit identical.
+    
+    Batches shrink as the evidence grows, so the dense matrices of one batch
+    stay within MAX_BATCH_BYTES however large the codebase is.
+    """
+    
+    # Dense requirement x evidence float64 matrices alive at once while a batch is scored
+    BATCH_MATRICES = 4
+    MAX_BATCH_BYTES = 64 * 1024 * 1024
+    
+    def __init__(self, index: EvidenceIndex, type_relevance_map: Dict[str, Dict[str, float]],
+                 batch_size: int = 256, top_k: int = 10, threshold: float = 0.3):
+        self.index = index
+        self.size = len(index.evidence)
+        row_bytes = self.BATCH_MATRICES * 8 * max(self.size, 1)
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH_BYTES // row_bytes))
+        self.top_k = top_k
+        self.threshold = threshold
+        
+        # Type relevance table: one row per known category plus a default row,
+        # one column per code type plus a column for unknown types
+        code_types = [code_type.value for code_type in CodeType]
+        self.category_rows = {category: row for row, category in enumerate(type_relevance_map)}
+        self.type_table = np.full((len(type_relevance_map) + 1, len(code_types) + 1), 0.5)
+        for category, row in self.category_rows.items():
+            relevance = type_relevance_map[category]
+            self.type_table[row] = [relevance.get(code_type, 0.3) for code_type in code_types] + [0.3]
+        
+        type_columns = {code_type: column for column, code_type in enumerate(code_types)}
+        self.evidence_type_columns = np.array(
+            [type_columns.get(evidence.code_type, len(code_types)) for evidence in index.evidence],
+            dtype=np.intp)
+        
+        self.term_columns: Dict[Tuple[str, str], int] = {}
+        self.term_postings: List["np.ndarray"] = []
+        self.term_matrix = None
+    
+    def _term_column(self, kind: str, term: str) -> int:
+        """Return the incidence column of a keyword hit ("text"/"context") or name word ("name")"""
+        key = (kind, term)
+        column = self.term_columns.get(key)
+        if column is None:
+            if kind == "name":
+                postings = self.index.name_word_postings.get(term, [])
+            else:
+                text_postings, context_postings = self.index.keyword_occurrences(term)
+                postings = text_postings if kind == "text" else context_postings
+            column = len(self.term_postings)
+            self.term_columns[key] = column
+            self.term_postings.append(np.array(postings, dtype=np.intp))
+            self.term_matrix = None
+        return column
+    
+    def _counts(self, term_lists: List[List[int]]) -> "np.ndarray":
+        """Return a requirement x evidence matrix counting evidence hits of each row's terms"""
+        if sparse is not None:
+            if self.term_matrix is None:
+                # Term x evidence incidence matrix over every term seen so far
+                rows = np.repeat(np.arange(len(self.term_postings)), [len(p) for p in self.term_postings])
+                cols = np.concatenate(self.term_postings) if self.term_postings else np.zeros(0, dtype=np.intp)
+                self.term_matrix = sparse.csr_matrix(
+                    (np.ones(len(cols)), (rows, cols)), shape=(len(self.term_postings), self.size))
+            rows = np.repeat(np.arange(len(term_lists)), [len(terms) for terms in term_lists])
+            cols = np.array([column for terms in term_lists for column in terms], dtype=np.intp)
+            selection = sparse.csr_matrix(
+                (np.ones(len(cols)), (rows, cols)), shape=(len(term_lists), len(self.term_postings)))
+            counts = (selection @ self.term_matrix).toarray()
+        else:
+            # Terms are distinct within a row, so their postings can be added directly
+            counts = np.zeros((len(term_lists), self.size))
+            for row, terms in enumerate(term_lists):
+                for column in terms:
+                    counts[row, self.term_postings[column]] += 1
+        
+        return counts
+    
+    def score_batch(self, requirements: List[RequirementSpec], keyword_lists: List[List[str]]) -> "np.ndarray":
+        """Return the requirement x evidence score matrix for a batch of requirements"""
+        text_terms = [[self._term_column("text", keyword) for keyword in keywords] for keywords in keyword_lists]
+        context_terms = [[self._term_column("context", keyword) for keyword in keywords] for keywords in keyword_lists]
+        word_sets = [_word_set(requirement.text) for requirement in requirements]
+        name_terms = [[self._term_column("name", word) for word in words] for words in word_sets]
+        
+        # Rows without keywords have zero hits; dividing by one keeps them at zero
+        keyword_counts = np.array([max(len(keywords), 1) for keywords in keyword_lists], dtype=float)[:, None]
+        word_counts = np.array([max(len(words), 1) for words in word_sets], dtype=float)[:, None]
+        
+        category_rows = np.array([
+            self.category_rows.get(
+                requirement.category.split(' - ')[0] if ' - ' in requirement.category else requirement.category,
+                len(self.category_rows))
+            for requirement in requirements
+        ], dtype=np.intp)
+        
+        scores = self._counts(text_terms) / keyword_counts * 0.4
+        scores += self._counts(name_terms) / word_counts * 0.3
+        scores += self.type_table[category_rows[:, None], self.evidence_type_columns[None, :]] * 0.2
+        scores += self._counts(context_terms) / keyword_counts * 0.1
+        return np.minimum(scores, 1.0, out=scores)
+    
+    def top_matches(self, requirements: List[RequirementSpec],
+                    keyword_lists: List[List[str]]) -> List[List[Tuple[int, float]]]:
+        """Return each requirement's best (evidence position, score) pairs above the threshold
+        
+        Matches are ordered by descending score, ties by evidence position,
+        the same order the stable sort of the scalar path produces.
+        """
+        results = []
+        
+        for start in range(0, len(requirements), self.batch_size):
+            scores = self.score_batch(requirements[start:start + self.batch_size],
+                                      keyword_lists[start:start + self.batch_size])
+            
+            for row in scores:
+                positions = np.flatnonzero(row > self.threshold)
+                if len(positions) > self.top_k:
+                    # Keep everything tied with the k-th best score, then order exactly
+                    candidate_scores = row[positions]
+                    kth_score = candidate_scores[np.argpartition(candidate_scores, -self.top_k)[-self.top_k]]
+                    positions = positions[row[positions] >= kth_score]
+                order = np.lexsort((positions, -row[positions]))[:self.top_k]
+                results.append([(int(positions[i]), float(row[positions[i]])) for i in order])
+        
+        return results
 
 class RequirementMatcher:
     """Matches requirements to implementation evidence using various algorithms"""
     
-    def __init__(self, requirements: List[RequirementSpec], evidence: List[ImplementationEvidence]):
+    BACKENDS = ("python", "numpy")
+    # Fewer requirements than this are not worth forking worker processes for
+    PARALLEL_MIN_REQUIREMENTS = 32
+    
+    def __init__(self, requirements: List[RequirementSpec], evidence: List[ImplementationEvidence],
+                 backend: str = "python", metrics: Optional[PipelineMetrics] = None,
+                 cache: Optional[AlignmentCache] = None, jobs: int = 1):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown matching backend: {backend}")
         self.requirements = requirements
         self.evidence = evidence
         self.alignments = []
+        self.index = None
+        self.metrics = metrics
+        self.cache = cache
+        self.jobs = jobs
+        # The numpy backend falls back to the pure-Python scorer when numpy is absent
+        self.backend = backend if backend != "numpy" or np is not None else "python"
     
     def match_requirements_to_evidence(self) -> List[RequirementAlignment]:
         """Match all requirements to implementation evidence"""
-        alignments = []
+        alignments = self.match_requirements(self.requirements)
+        if self.cache is not None:
+            self.cache.prune()
+            self.cache.save()
         
-        for requirement in self.requirements:
+        self.alignments = alignments
+        return alignments
+    
+    def iter_alignments(self, batch_size: int = 64) -> Iterator[RequirementAlignment]:
+        """Yield the alignments of all requirements in order, matching them a batch at a time
+        
+        The first alignments are available after one batch instead of after
+        the whole run; the results are the same as match_requirements_to_evidence().
+        With several jobs each batch is split across the worker processes.
+        """
+        batch_size *= max(1, self.jobs)
+        self.alignments = []
+        for start in range(0, len(self.requirements), batch_size):
+            for alignment in self.match_requirements(self.requirements[start:start + batch_size]):
+                self.alignments.append(alignment)
+                yield alignment
+        
+        if self.cache is not None:
+            self.cache.prune()
+            self.cache.save()
+    
+    def match_requirements(self, requirements: List[RequirementSpec]) -> List[RequirementAlignment]:
+        """Match the given requirements to the evidence with the configured backend"""
+        if self.metrics is not None:
+            self.metrics.count('match', 'requirements_matched', len(requirements))
+        
+        if self.cache is not None:
+            return self._match_requirements_cached(requirements)
+        
+        if self.backend == "numpy":
+            return self._match_requirements_vectorized(requirements)
+        
+        if self._use_worker_processes(requirements):
+            keyword_lists = [self._extract_keywords_from_requirement(requirement) for requirement in requirements]
+            top_matches = self._parallel_top_matches(requirements, keyword_lists)
+            return [
+                self._build_alignment(requirement, keywords, matches)
+                for requirement, keywords, matches in zip(requirements, keyword_lists, top_matches)
+            ]
+        
+        alignments = []
+        for requirement in requirements:
             alignment = self._match_single_requirement(requirement)
             alignments.append(alignment)
+        return alignments
+    
+    def _use_worker_processes(self, requirements: List[RequirementSpec]) -> bool:
+        """Check whether python-backend scoring should be spread across worker processes
+        
+        Workers inherit the evidence and its index through fork(), so
+        platforms without fork always score in this process.
+        """
+        return (self.jobs > 1 and len(requirements) >= self.PARALLEL_MIN_REQUIREMENTS
+                and 'fork' in multiprocessing.get_all_start_methods())
+    
+    def _parallel_top_matches(self, requirements: List[RequirementSpec],
+                              keyword_lists: List[List[str]]) -> List[List[Tuple[int, float]]]:
+        """Score requirements across forked worker processes, keeping their order
+        
+        The index is built before the workers are forked, so they inherit the
+        evidence, texts and postings instead of receiving them pickled; only
+        the requirement chunks and the (evidence position, score) matches
+        cross process boundaries.
+        """
+        global _fork_matcher
+        self._get_evidence_index()
+        
+        chunk_size = max(1, -(-len(requirements) // (self.jobs * 4)))
+        chunks = [
+            (requirements[start:start + chunk_size], keyword_lists[start:start + chunk_size])
+            for start in range(0, len(requirements), chunk_size)
+        ]
         
-        self.alignments = alignments
+        top_matches = []
+        _fork_matcher = self
+        try:
+            with ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+                # executor.map yields in submission order, so the matches stay in requirement order
+                for chunk_matches, counters in executor.map(_match_chunk_task, chunks):
+                    top_matches.extend(chunk_matches)
+                    if self.metrics is not None:
+                        for name, value in counters.items():
+                            self.metrics.count('match', name, value)
+        finally:
+            _fork_matcher = None
+        
+        return top_matches
+    
+    def _match_requirements_cached(self, requirements: List[RequirementSpec]) -> List[RequirementAlignment]:
+        """Reuse cached alignments of requirements whose candidate evidence is unchanged
+        
+        Only the remaining requirements are scored, with the configured backend,
+        and their matches are stored back into the cache.
+        """
+        index = self._get_evidence_index()
+        alignments: List[Optional[RequirementAlignment]] = [None] * len(requirements)
+        misses = []
+        
+        for position, requirement in enumerate(requirements):
+            keywords = self._extract_keywords_from_requirement(requirement)
+            candidates = index.candidates(keywords, _word_set(requirement.text))
+            key = AlignmentCache.requirement_key(requirement)
+            fingerprint = index.fingerprint(candidates)
+            
+            matches = self.cache.lookup(key, fingerprint, candidates)
+            if matches is None:
+                misses.append((position, keywords, candidates, key, fingerprint))
+            else:
+                alignments[position] = self._build_alignment(requirement, keywords, matches)
+        
+        if self.backend == "numpy":
+            top_matches = self._vectorized_top_matches([requirements[miss[0]] for miss in misses],
+                                                       [miss[1] for miss in misses])
+        elif self._use_worker_processes(misses):
+            top_matches = self._parallel_top_matches([requirements[miss[0]] for miss in misses],
+                                                     [miss[1] for miss in misses])
+        else:
+            top_matches = [self._score_candidates(requirements[position], keywords, candidates)
+                           for position, keywords, candidates, key, fingerprint in misses]
+        
+        for (position, keywords, candidates, key, fingerprint), matches in zip(misses, top_matches):
+            self.cache.store(key, fingerprint, candidates, matches)
+            alignments[position] = self._build_alignment(requirements[position], keywords, matches)
+        
+        if self.metrics is not None:
+            self.metrics.count('match', 'alignments_cached', len(requirements) - len(misses))
         return alignments
     
+    def _match_requirements_vectorized(self, requirements: List[RequirementSpec]) -> List[RequirementAlignment]:
+        """Match requirements using the batched numpy scorer"""
+        keyword_lists = [self._extract_keywords_from_requirement(requirement) for requirement in requirements]
+        top_matches = self._vectorized_top_matches(requirements, keyword_lists)
+        
+        return [
+            self._build_alignment(requirement, keywords, matches)
+            for requirement, keywords, matches in zip(requirements, keyword_lists, top_matches)
+        ]
+    
+    def _vectorized_top_matches(self, requirements: List[RequirementSpec],
+                                keyword_lists: List[List[str]]) -> List[List[Tuple[int, float]]]:
+        """Return each requirement's (evidence position, score) matches from the batched numpy scorer"""
+        scorer = VectorizedScorer(self._get_evidence_index(), self.TYPE_RELEVANCE_MAP)
+        top_matches = scorer.top_matches(requirements, keyword_lists)
+        if self.metrics is not None:
+            # The vectorized scorer scores every evidence item
+            self.metrics.count('match', 'candidates_scored', len(requirements) * len(self.evidence))
+        return top_matches
+    
     def _match_single_requirement(self, requirement: RequirementSpec) -> RequirementAlignment:
         """Match a single requirement to evidence"""
-        matched_evidence = []
-        
         # Extract keywords from requirement
         keywords = self._extract_keywords_from_requirement(requirement)
         
-        # Score each piece of evidence against the requirement
-        evidence_scores = []
-        for evidence in self.evidence:
-            score = self._calculate_evidence_score(requirement, evidence, keywords)
-            if score > 0.3:  # Threshold for relevance
-                evidence_scores.append((evidence, score))
+        top_matches = self._top_matches(requirement, keywords)
+        
+        return self._build_alignment(requirement, keywords, top_matches)
+    
+    def _top_matches(self, requirement: RequirementSpec, keywords: List[str]) -> List[Tuple[int, float]]:
+        """Return a requirement's (evidence position, score) matches from the python scorer"""
+        # Evidence sharing no keyword and no name word scores at most
+        # 0.2 * type relevance, which never clears the threshold, so only
+        # the indexed candidates need scoring
+        requirement_words = _word_set(requirement.text)
+        candidates = self._get_evidence_index().candidates(keywords, requirement_words)
+        return self._score_candidates(requirement, keywords, candidates)
+    
+    def _score_candidates(self, requirement: RequirementSpec, keywords: List[str],
+                          candidates: List[int], top_k: int = 10) -> List[Tuple[int, float]]:
+        """Score candidate evidence and return the best (evidence position, score) matches
+        
+        Matches are ordered by descending score, ties by evidence position.
+        Every candidate first gets a cheap upper bound on its score, and
+        candidates are fully scored in descending bound order: once a bound can
+        no longer clear the threshold or beat the current k-th best match, the
+        remaining candidates are skipped (MaxScore-style early termination).
+        """
+        index = self._get_evidence_index()
+        
+        # Keyword and name word hits for all candidates at once, instead of
+        # testing every keyword against every candidate's text and context
+        text_hits, context_hits = index.keyword_hits(keywords)
+        requirement_words = _word_set(requirement.text)
+        name_hits = Counter(chain.from_iterable(index.name_word_postings.get(word, ()) for word in requirement_words))
+        
+        # The bound repeats _calculate_evidence_score's arithmetic step by step
+        # (so rounding cannot push the real score above it), with the best type
+        # relevance of the requirement's category in place of the evidence's own
+        keyword_count = len(keywords)
+        word_count = len(requirement_words)
+        type_bound = self._max_type_relevance(requirement)
+        bounds = []
+        for idx in candidates:
+            bound = 0.0
+            if keyword_count:
+                bound += text_hits.get(idx, 0) / keyword_count * 0.4
+            bound += (name_hits.get(idx, 0) / word_count if word_count else 0.0) * 0.3
+            bound += type_bound * 0.2
+            if keyword_count:
+                bound += context_hits.get(idx, 0) / keyword_count * 0.1
+            bounds.append((-min(bound, 1.0), idx))
+        bounds.sort()
+        
+        # Min-heap of (score, -position): the root is the worst of the best matches so far
+        best: List[Tuple[float, int]] = []
+        scored = 0
+        for negative_bound, idx in bounds:
+            bound = -negative_bound
+            if bound <= 0.3:  # Threshold for relevance
+                break
+            if len(best) == top_k:
+                kth_score, kth_position = best[0][0], -best[0][1]
+                if bound < kth_score:
+                    break
+                if bound == kth_score and idx > kth_position:
+                    continue
+            
+            score = self._calculate_evidence_score(requirement, self.evidence[idx], keywords,
+                                                   index.evidence_texts[idx], index.context_texts[idx],
+                                                   text_hits.get(idx, 0), context_hits.get(idx, 0))
+            scored += 1
+            if score > 0.3:
+                if len(best) < top_k:
+                    heapq.heappush(best, (score, -idx))
+                elif (score, -idx) > best[0]:
+                    heapq.heapreplace(best, (score, -idx))
+        
+        if self.metrics is not None:
+            self.metrics.count('match', 'candidates_scored', scored)
+            self.metrics.count('match', 'candidates_pruned', len(candidates) - scored)
+        
+        return [(-negative_position, score) for score, negative_position in sorted(best, key=lambda m: (-m[0], -m[1]))]
+    
+    def _max_type_relevance(self, requirement: RequirementSpec) -> float:
+        """Return the highest type relevance any evidence can have for the requirement"""
+        category_key = requirement.category.split(' - ')[0] if ' - ' in requirement.category else requirement.category
+        
+        if category_key in self.TYPE_RELEVANCE_MAP:
+            relevance = self.TYPE_RELEVANCE_MAP[category_key]
+            return max(relevance.get(code_type.value, 0.3) for code_type in CodeType)
         
-        # Sort by score and take the best matches
-        evidence_scores.sort(key=lambda x: x[1], reverse=True)
-        matched_evidence = [ev for ev, score in evidence_scores[:10]]  # Top 10 matches
+        return 0.5  # Default relevance
+    
+    def _build_alignment(self, requirement: RequirementSpec, keywords: List[str],
+                         top_matches: List[Tuple[int, float]]) -> RequirementAlignment:
+        """Build the alignment for a requirement from its (evidence position, score) matches"""
+        index = self._get_evidence_index()
+        matched_evidence = [self.evidence[idx] for idx, score in top_matches]
+        scores = [score for idx, score in top_matches]
+        texts = [index.evidence_texts[idx] for idx, score in top_matches]
         
         # Determine implementation status
-        status = self._determine_implementation_status(requirement, matched_evidence)
+        status = self._determine_implementation_status(requirement, matched_evidence, keywords)
         
-        # Calculate confidence and coverage
-        confidence = self._calculate_confidence_score(requirement, matched_evidence)
-        coverage = self._calculate_coverage_percentage(requirement, matched_evidence)
+        # Calculate confidence and coverage from the scores and texts computed above
+        confidence = self._calculate_confidence_score(requirement, matched_evidence, keywords, scores)
+        coverage = self._calculate_coverage_percentage(requirement, matched_evidence, keywords, texts)
         
         return RequirementAlignment(
             requirement=requirement,
@@ -551,9 +2644,18 @@ class RequirementMatcher:
             evidence=matched_evidence,
             confidence_score=confidence,
             coverage_percentage=coverage,
-            notes=self._generate_alignment_notes(requirement, matched_evidence, status)
+            notes=self._generate_alignment_notes(requirement, matched_evidence, status, keywords),
+            keywords=keywords,
+            evidence_scores=scores,
+            evidence_texts=texts
         )
     
+    def _get_evidence_index(self) -> EvidenceIndex:
+        """Build the evidence index on first use"""
+        if self.index is None:
+            self.index = EvidenceIndex(self.evidence)
+        return self.index
+    
     def _extract_keywords_from_requirement(self, requirement: RequirementSpec) -> List[str]:
         """Extract searchable keywords from a requirement"""
         keywords = []
@@ -584,19 +2686,28 @@ class RequirementMatcher:
         # Add technical details
         keywords.extend(requirement.technical_details)
         
-        # Remove duplicates and filter
-        keywords = list(set(keywords))
+        # Remove duplicates (keeping first-seen order so reports are reproducible) and filter
+        keywords = list(dict.fromkeys(keywords))
         keywords = [k for k in keywords if len(k) > 2]
         
         return keywords
     
-    def _calculate_evidence_score(self, requirement: RequirementSpec, evidence: ImplementationEvidence, keywords: List[str]) -> float:
-        """Calculate how well a piece of evidence matches a requirement"""
+    def _calculate_evidence_score(self, requirement: RequirementSpec, evidence: ImplementationEvidence, keywords: List[str],
+                                  evidence_text: Optional[str] = None, context_text: Optional[str] = None,
+                                  keyword_matches: Optional[int] = None, context_matches: Optional[int] = None) -> float:
+        """Calculate how well a piece of evidence matches a requirement
+        
+        ``evidence_text`` and ``context_text`` may be passed in precomputed
+        (as held by the EvidenceIndex) to avoid rebuilding them per requirement,
+        and so may the keyword hit counts (see EvidenceIndex.keyword_hits).
+        """
         score = 0.0
         
         # Direct keyword matching
-        evidence_text = f"{evidence.name} {evidence.content}".lower()
-        keyword_matches = sum(1 for keyword in keywords if keyword in evidence_text)
+        if keyword_matches is None:
+            if evidence_text is None:
+                evidence_text = f"{evidence.name} {evidence.content}".lower()
+            keyword_matches = sum(1 for keyword in keywords if keyword in evidence_text)
         
         if keywords:
             keyword_score = keyword_matches / len(keywords)
@@ -611,8 +2722,10 @@ class RequirementMatcher:
         score += type_relevance * 0.2
         
         # Context matching
-        context_text = ' '.join(evidence.context_lines).lower()
-        context_matches = sum(1 for keyword in keywords if keyword in context_text)
+        if context_matches is None:
+            if context_text is None:
+                context_text = ' '.join(evidence.context_lines).lower()
+            context_matches = sum(1 for keyword in keywords if keyword in context_text)
         if keywords:
             context_score = context_matches / len(keywords)
             score += context_score * 0.1
@@ -621,8 +2734,8 @@ class RequirementMatcher:
     
     def _calculate_name_similarity(self, requirement_text: str, evidence_name: str) -> float:
         """Calculate similarity between requirement text and evidence name"""
-        req_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', requirement_text.lower()))
-        evidence_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', evidence_name.lower()))
+        req_words = _word_set(requirement_text)
+        evidence_words = _word_set(evidence_name)
         
         if not req_words:
             return 0.0
@@ -630,46 +2743,50 @@ class RequirementMatcher:
         intersection = req_words.intersection(evidence_words)
         return len(intersection) / len(req_words)
     
+    # Relevance of each evidence code type per requirement category
+    TYPE_RELEVANCE_MAP = {
+        'User Story': {
+            'function': 0.8,
+            'selector': 0.6,
+            'variable': 0.4,
+            'constant': 0.3,
+            'class': 0.7
+        },
+        'Feature': {
+            'function': 0.9,
+            'selector': 0.5,
+            'variable': 0.4,
+            'constant': 0.6,
+            'class': 0.8
+        },
+        'Technical': {
+            'function': 0.7,
+            'selector': 0.3,
+            'variable': 0.5,
+            'constant': 0.8,
+            'class': 0.9
+        }
+    }
+    
     def _calculate_type_relevance(self, requirement: RequirementSpec, evidence: ImplementationEvidence) -> float:
         """Calculate how relevant the evidence type is to the requirement"""
-        type_relevance_map = {
-            'User Story': {
-                'function': 0.8,
-                'selector': 0.6,
-                'variable': 0.4,
-                'constant': 0.3,
-                'class': 0.7
-            },
-            'Feature': {
-                'function': 0.9,
-                'selector': 0.5,
-                'variable': 0.4,
-                'constant': 0.6,
-                'class': 0.8
-            },
-            'Technical': {
-                'function': 0.7,
-                'selector': 0.3,
-                'variable': 0.5,
-                'constant': 0.8,
-                'class': 0.9
-            }
-        }
-        
         category_key = requirement.category.split(' - ')[0] if ' - ' in requirement.category else requirement.category
         
-        if category_key in type_relevance_map:
-            return type_relevance_map[category_key].get(evidence.code_type, 0.3)
+        if category_key in self.TYPE_RELEVANCE_MAP:
+            return self.TYPE_RELEVANCE_MAP[category_key].get(evidence.code_type, 0.3)
         
         return 0.5  # Default relevance
     
-    def _determine_implementation_status(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence]) -> ImplementationStatus:
+    def _determine_implementation_status(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence],
+                                         keywords: Optional[List[str]] = None) -> ImplementationStatus:
         """Determine the implementation status based on evidence"""
         if not evidence:
             return ImplementationStatus.MISSING
         
         # Calculate average confidence of evidence
-        total_keywords = len(self._extract_keywords_from_requirement(requirement))
+        if keywords is None:
+            keywords = self._extract_keywords_from_requirement(requirement)
+        total_keywords = len(keywords)
         if total_keywords == 0:
             return ImplementationStatus.MISSING
         
@@ -691,19 +2808,27 @@ class RequirementMatcher:
         else:
             return ImplementationStatus.MISSING
     
-    def _calculate_confidence_score(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence]) -> float:
-        """Calculate confidence in the alignment"""
+    def _calculate_confidence_score(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence],
+                                    keywords: Optional[List[str]] = None, scores: Optional[List[float]] = None) -> float:
+        """Calculate confidence in the alignment
+        
+        ``scores`` are the evidence scores already computed during matching;
+        evidence is only rescored when they are not supplied.
+        """
         if not evidence:
             return 0.0
         
-        keywords = self._extract_keywords_from_requirement(requirement)
+        if keywords is None:
+            keywords = self._extract_keywords_from_requirement(requirement)
         if not keywords:
             return 0.3
         
+        if scores is None:
+            scores = [self._calculate_evidence_score(requirement, ev, keywords) for ev in evidence]
+        
         # Average evidence scores
         total_score = 0.0
-        for ev in evidence:
-            score = self._calculate_evidence_score(requirement, ev, keywords)
+        for score in scores:
             total_score += score
         
         avg_score = total_score / len(evidence)
@@ -714,22 +2839,27 @@ class RequirementMatcher:
         
         return min(avg_score + type_bonus, 1.0)
     
-    def _calculate_coverage_percentage(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence]) -> float:
+    def _calculate_coverage_percentage(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence],
+                                       keywords: Optional[List[str]] = None, texts: Optional[List[str]] = None) -> float:
         """Calculate what percentage of the requirement is covered"""
-        keywords = self._extract_keywords_from_requirement(requirement)
+        if keywords is None:
+            keywords = self._extract_keywords_from_requirement(requirement)
         if not keywords:
             return 0.0 if not evidence else 50.0
         
+        if texts is None:
+            texts = [f"{ev.name} {ev.content}".lower() for ev in evidence]
+        
         covered_keywords = set()
-        for ev in evidence:
-            evidence_text = f"{ev.name} {ev.content}".lower()
+        for evidence_text in texts:
             for keyword in keywords:
                 if keyword in evidence_text:
                     covered_keywords.add(keyword)
         
         return (len(covered_keywords) / len(keywords)) * 100
     
-    def _generate_alignment_notes(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence], status: ImplementationStatus) -> str:
+    def _generate_alignment_notes(self, requirement: RequirementSpec, evidence: List[ImplementationEvidence], status: ImplementationStatus,
+                                  keywords: Optional[List[str]] = None) -> str:
         """Generate notes about the alignment"""
         notes = []
         
@@ -738,7 +2868,7 @@ class RequirementMatcher:
             notes.append(f"Found {len(evidence)} pieces of evidence across {len(evidence_types)} code types")
             
             if evidence:
-                main_files = set(os.path.basename(ev.file_path) for ev in evidence[:3])
+                main_files = dict.fromkeys(os.path.basename(ev.file_path) for ev in evidence[:3])
                 notes.append(f"Primary implementation in: {', '.join(main_files)}")
         
         elif status == ImplementationStatus.PARTIALLY_IMPLEMENTED:
@@ -747,7 +2877,8 @@ class RequirementMatcher:
                 notes.append(f"Found evidence in {evidence[0].code_type}: {evidence[0].name}")
         
         elif status == ImplementationStatus.MISSING:
-            keywords = self._extract_keywords_from_requirement(requirement)
+            if keywords is None:
+                keywords = self._extract_keywords_from_requirement(requirement)
             if keywords:
                 notes.append(f"No evidence found for key terms: {', '.join(keywords[:3])}")
             else:
@@ -761,82 +2892,106 @@ class RequirementMatcher:
         
         return '; '.join(notes)
 
+# Set by the parent right before it forks matching workers, which inherit it
+_fork_matcher: Optional[RequirementMatcher] = None
+
+def _match_chunk_task(chunk: Tuple[List[RequirementSpec], List[List[str]]]) -> Tuple[List[List[Tuple[int, float]]], Dict[str, float]]:
+    """Process-pool entry point scoring a chunk of requirements with the inherited matcher
+    
+    Returns the matches of each requirement and the match counters gathered
+    for the chunk, which the parent folds into its own metrics.
+    """
+    requirements, keyword_lists = chunk
+    metrics = PipelineMetrics()
+    _fork_matcher.metrics = metrics
+    top_matches = [_fork_matcher._top_matches(requirement, keywords)
+                   for requirement, keywords in zip(requirements, keyword_lists)]
+    return top_matches, metrics.counters.get('match', {})
+
 class CSVReportGenerator:
     """Generates CSV reports for requirement alignments"""
     
+    MATRIX_FIELDNAMES = [
+        'Requirement_ID', 'Requirement_Text', 'Category', 'Priority',
+        'Status', 'Confidence_Score', 'Coverage_Percentage',
+        'Evidence_Count', 'Evidence_Types', 'Implementation_Files',
+        'Key_Functions', 'Key_Selectors', 'Key_Constants',
+        'Notes', 'User_Story'
+    ]
+    EVIDENCE_FIELDNAMES = [
+        'Requirement_ID', 'Evidence_File', 'Evidence_Line', 'Evidence_Type',
+        'Evidence_Name', 'Evidence_Content', 'Match_Score'
+    ]
+    SUMMARY_FIELDNAMES = [
+        'Metric', 'Category', 'Implemented', 'Partially', 
+        'Missing', 'Inconsistent', 'Total', 'Implementation_Rate'
+    ]
+    # Bump (it is stored as PRAGMA user_version) whenever the tables change
+    SQLITE_SCHEMA_VERSION = 1
+    SQLITE_SCHEMA = """
+        CREATE TABLE requirements (
+            position INTEGER PRIMARY KEY,  -- report order; ids are not guaranteed unique
+            id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            category TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            user_story TEXT NOT NULL,
+            technical_details TEXT NOT NULL,  -- JSON list
+            acceptance_criteria TEXT NOT NULL  -- JSON list
+        );
+        CREATE TABLE evidence (
+            id INTEGER PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            line_number INTEGER NOT NULL,
+            code_type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            content TEXT NOT NULL
+        );
+        CREATE TABLE alignments (
+            requirement_position INTEGER PRIMARY KEY REFERENCES requirements (position),
+            status TEXT NOT NULL,
+            confidence_score REAL NOT NULL,
+            coverage_percentage REAL NOT NULL,
+            evidence_count INTEGER NOT NULL,
+            notes TEXT NOT NULL,
+            keywords TEXT NOT NULL  -- JSON list
+        );
+        CREATE TABLE alignment_evidence (
+            requirement_position INTEGER NOT NULL REFERENCES requirements (position),
+            rank INTEGER NOT NULL,
+            evidence_id INTEGER NOT NULL REFERENCES evidence (id),
+            evidence_score REAL,
+            match_score REAL NOT NULL,
+            PRIMARY KEY (requirement_position, rank)
+        );
+        CREATE INDEX requirements_id ON requirements (id);
+        CREATE INDEX requirements_category ON requirements (category);
+        CREATE INDEX alignments_status ON alignments (status);
+        CREATE INDEX evidence_file_path ON evidence (file_path);
+        CREATE INDEX evidence_name ON evidence (name);
+        CREATE INDEX alignment_evidence_evidence ON alignment_evidence (evidence_id);
+    """
+    
     def __init__(self, alignments: List[RequirementAlignment]):
         self.alignments = alignments
     
     def generate_matrix_csv(self, output_file: str = "requirement_alignment_matrix.csv"):
         """Generate the main alignment matrix CSV"""
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'Requirement_ID', 'Requirement_Text', 'Category', 'Priority',
-                'Status', 'Confidence_Score', 'Coverage_Percentage',
-                'Evidence_Count', 'Evidence_Types', 'Implementation_Files',
-                'Key_Functions', 'Key_Selectors', 'Key_Constants',
-                'Notes', 'User_Story'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=self.MATRIX_FIELDNAMES)
             writer.writeheader()
             
             for alignment in self.alignments:
-                # Group evidence by type
-                evidence_by_type = {}
-                for evidence in alignment.evidence:
-                    if evidence.code_type not in evidence_by_type:
-                        evidence_by_type[evidence.code_type] = []
-                    evidence_by_type[evidence.code_type].append(evidence)
-                
-                # Extract file names
-                files = list(set(os.path.basename(ev.file_path) for ev in alignment.evidence))
-                
-                writer.writerow({
-                    'Requirement_ID': alignment.requirement.id,
-                    'Requirement_Text': alignment.requirement.text[:200] + ('...' if len(alignment.requirement.text) > 200 else ''),
-                    'Category': alignment.requirement.category,
-                    'Priority': alignment.requirement.priority,
-                    'Status': alignment.status.value,
-                    'Confidence_Score': f"{alignment.confidence_score:.2f}",
-                    'Coverage_Percentage': f"{alignment.coverage_percentage:.1f}%",
-                    'Evidence_Count': len(alignment.evidence),
-                    'Evidence_Types': ', '.join(evidence_by_type.keys()),
-                    'Implementation_Files': ', '.join(files[:3]),  # Top 3 files
-                    'Key_Functions': ', '.join([ev.name for ev in evidence_by_type.get('function', [])][:3]),
-                    'Key_Selectors': ', '.join([ev.name for ev in evidence_by_type.get('selector', [])][:3]),
-                    'Key_Constants': ', '.join([ev.name for ev in evidence_by_type.get('constant', [])][:3]),
-                    'Notes': alignment.notes,
-                    'User_Story': alignment.requirement.user_story
-                })
+                writer.writerow(self._matrix_row(alignment))
     
     def generate_detailed_evidence_csv(self, output_file: str = "detailed_evidence.csv"):
         """Generate detailed evidence CSV"""
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'Requirement_ID', 'Evidence_File', 'Evidence_Line', 'Evidence_Type',
-                'Evidence_Name', 'Evidence_Content', 'Match_Score'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=self.EVIDENCE_FIELDNAMES)
             writer.writeheader()
             
             for alignment in self.alignments:
-                keywords = self._extract_keywords_from_alignment(alignment)
-                
-                for evidence in alignment.evidence:
-                    # Calculate individual match score
-                    score = self._calculate_evidence_score_for_requirement(alignment.requirement, evidence, keywords)
-                    
-                    writer.writerow({
-                        'Requirement_ID': alignment.requirement.id,
-                        'Evidence_File': evidence.file_path,
-                        'Evidence_Line': evidence.line_number,
-                        'Evidence_Type': evidence.code_type,
-                        'Evidence_Name': evidence.name,
-                        'Evidence_Content': evidence.content[:100] + ('...' if len(evidence.content) > 100 else ''),
-                        'Match_Score': f"{score:.3f}"
-                    })
+                writer.writerows(self._evidence_rows(alignment))
     
     def generate_summary_csv(self, output_file: str = "alignment_summary.csv"):
         """Generate summary statistics CSV"""
@@ -844,42 +2999,167 @@ class CSVReportGenerator:
         category_stats = {}
         
         for alignment in self.alignments:
-            # Count by status
-            status = alignment.status.value
-            if status not in status_counts:
-                status_counts[status] = 0
-            status_counts[status] += 1
-            
-            # Count by category
-            category = alignment.requirement.category
-            if category not in category_stats:
-                category_stats[category] = {
-                    'total': 0, 'implemented': 0, 'partially': 0, 
-                    'missing': 0, 'inconsistent': 0
-                }
+            self._count_alignment(alignment, status_counts, category_stats)
+        
+        self._write_summary_csv(output_file, status_counts, category_stats)
+    
+    def generate_sqlite(self, output_file: str = "alignments.db",
+                        evidence: Optional[List[ImplementationEvidence]] = None):
+        """Write requirements, evidence, alignments and their evidence links to a SQLite database
+        
+        ``evidence`` is the full evidence list; without it only the matched
+        evidence is stored. Evidence content is stored in full. The database
+        is built next to the output file in one transaction and then moved
+        over it, so readers never see a partially written database.
+        """
+        # Store views compare equal per row; plain evidence objects are the
+        # very objects the alignments hold
+        evidence_ids: Dict[object, int] = {}
+        evidence_rows = []
+        
+        def evidence_id(item: ImplementationEvidence) -> int:
+            key = item if isinstance(item, EvidenceView) else id(item)
+            row_id = evidence_ids.get(key)
+            if row_id is None:
+                row_id = evidence_ids[key] = len(evidence_rows) + 1
+                evidence_rows.append((row_id, item.file_path, item.line_number, item.code_type, item.name, item.content))
+            return row_id
+        
+        for item in evidence or []:
+            evidence_id(item)
+        
+        requirement_rows = []
+        alignment_rows = []
+        link_rows = []
+        for position, alignment in enumerate(self.alignments):
+            requirement = alignment.requirement
+            requirement_rows.append((
+                position, requirement.id, requirement.text, requirement.category, requirement.priority,
+                requirement.user_story, json.dumps(requirement.technical_details),
+                json.dumps(requirement.acceptance_criteria)
+            ))
+            alignment_rows.append((
+                position, alignment.status.value, alignment.confidence_score,
+                alignment.coverage_percentage, len(alignment.evidence), alignment.notes,
+                json.dumps(alignment.keywords)
+            ))
             
-            category_stats[category]['total'] += 1
+            keywords = self._extract_keywords_from_alignment(alignment)
+            texts = alignment.evidence_texts or [None] * len(alignment.evidence)
+            scores = alignment.evidence_scores or [None] * len(alignment.evidence)
+            for rank, (item, evidence_text, evidence_score) in enumerate(zip(alignment.evidence, texts, scores)):
+                match_score = self._calculate_evidence_score_for_requirement(requirement, item, keywords, evidence_text)
+                link_rows.append((position, rank, evidence_id(item), evidence_score, match_score))
+        
+        tmp_file = output_file + '.tmp'
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        connection = sqlite3.connect(tmp_file)
+        try:
+            # A crash leaves only the temporary file behind, so journaling buys nothing
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            with connection:
+                connection.executescript(self.SQLITE_SCHEMA)
+                connection.executemany("INSERT INTO requirements VALUES (?, ?, ?, ?, ?, ?, ?, ?)", requirement_rows)
+                connection.executemany("INSERT INTO evidence VALUES (?, ?, ?, ?, ?, ?)", evidence_rows)
+                connection.executemany("INSERT INTO alignments VALUES (?, ?, ?, ?, ?, ?, ?)", alignment_rows)
+                connection.executemany("INSERT INTO alignment_evidence VALUES (?, ?, ?, ?, ?)", link_rows)
+                connection.execute(f"PRAGMA user_version = {self.SQLITE_SCHEMA_VERSION}")
+        finally:
+            connection.close()
+        os.replace(tmp_file, output_file)
+    
+    def _matrix_row(self, alignment: RequirementAlignment) -> Dict:
+        """Build the alignment matrix row of one requirement"""
+        # Group evidence by type
+        evidence_by_type = {}
+        for evidence in alignment.evidence:
+            if evidence.code_type not in evidence_by_type:
+                evidence_by_type[evidence.code_type] = []
+            evidence_by_type[evidence.code_type].append(evidence)
+        
+        # Extract file names
+        files = list(dict.fromkeys(os.path.basename(ev.file_path) for ev in alignment.evidence))
+        
+        return {
+            'Requirement_ID': alignment.requirement.id,
+            'Requirement_Text': alignment.requirement.text[:200] + ('...' if len(alignment.requirement.text) > 200 else ''),
+            'Category': alignment.requirement.category,
+            'Priority': alignment.requirement.priority,
+            'Status': alignment.status.value,
+            'Confidence_Score': f"{alignment.confidence_score:.2f}",
+            'Coverage_Percentage': f"{alignment.coverage_percentage:.1f}%",
+            'Evidence_Count': len(alignment.evidence),
+            'Evidence_Types': ', '.join(evidence_by_type.keys()),
+            'Implementation_Files': ', '.join(files[:3]),  # Top 3 files
+            'Key_Functions': ', '.join([ev.name for ev in evidence_by_type.get('function', [])][:3]),
+            'Key_Selectors': ', '.join([ev.name for ev in evidence_by_type.get('selector', [])][:3]),
+            'Key_Constants': ', '.join([ev.name for ev in evidence_by_type.get('constant', [])][:3]),
+            'Notes': alignment.notes,
+            'User_Story': alignment.requirement.user_story
+        }
+    
+    def _evidence_rows(self, alignment: RequirementAlignment) -> List[Dict]:
+        """Build the detailed evidence rows of one requirement"""
+        rows = []
+        keywords = self._extract_keywords_from_alignment(alignment)
+        texts = alignment.evidence_texts or [None] * len(alignment.evidence)
+        
+        for evidence, evidence_text in zip(alignment.evidence, texts):
+            # Calculate individual match score, reusing the matcher's lowercased text
+            score = self._calculate_evidence_score_for_requirement(alignment.requirement, evidence, keywords, evidence_text)
             
-            if status == 'Implemented':
-                category_stats[category]['implemented'] += 1
-            elif status == 'Partially':
-                category_stats[category]['partially'] += 1
-            elif status == 'Missing':
-                category_stats[category]['missing'] += 1
-            elif status == 'Inconsistent':
-                category_stats[category]['inconsistent'] += 1
+            rows.append({
+                'Requirement_ID': alignment.requirement.id,
+                'Evidence_File': evidence.file_path,
+                'Evidence_Line': evidence.line_number,
+                'Evidence_Type': evidence.code_type,
+                'Evidence_Name': evidence.name,
+                'Evidence_Content': evidence.content[:100] + ('...' if len(evidence.content) > 100 else ''),
+                'Match_Score': f"{score:.3f}"
+            })
         
+        return rows
+    
+    @staticmethod
+    def _count_alignment(alignment: RequirementAlignment, status_counts: Dict[str, int],
+                         category_stats: Dict[str, Dict[str, int]]):
+        """Add one alignment to the summary counters"""
+        # Count by status
+        status = alignment.status.value
+        if status not in status_counts:
+            status_counts[status] = 0
+        status_counts[status] += 1
+        
+        # Count by category
+        category = alignment.requirement.category
+        if category not in category_stats:
+            category_stats[category] = {
+                'total': 0, 'implemented': 0, 'partially': 0, 
+                'missing': 0, 'inconsistent': 0
+            }
+        
+        category_stats[category]['total'] += 1
+        
+        if status == 'Implemented':
+            category_stats[category]['implemented'] += 1
+        elif status == 'Partially':
+            category_stats[category]['partially'] += 1
+        elif status == 'Missing':
+            category_stats[category]['missing'] += 1
+        elif status == 'Inconsistent':
+            category_stats[category]['inconsistent'] += 1
+    
+    def _write_summary_csv(self, output_file: str, status_counts: Dict[str, int],
+                           category_stats: Dict[str, Dict[str, int]]):
+        """Write the summary CSV from the status and per-category counters"""
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'Metric', 'Category', 'Implemented', 'Partially', 
-                'Missing', 'Inconsistent', 'Total', 'Implementation_Rate'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=self.SUMMARY_FIELDNAMES)
             writer.writeheader()
             
             # Overall summary
-            total_reqs = len(self.alignments)
+            total_reqs = sum(status_counts.values())
             implemented = status_counts.get('Implemented', 0)
             impl_rate = (implemented / total_reqs * 100) if total_reqs > 0 else 0
             
@@ -914,17 +3194,648 @@ class CSVReportGenerator:
         words = re.findall(r'\b[a-zA-Z]{3,}\b', text)
         return [word.lower() for word in words if len(word) > 3]
     
-    def _calculate_evidence_score_for_requirement(self, requirement: RequirementSpec, evidence: ImplementationEvidence, keywords: List[str]) -> float:
+    def _calculate_evidence_score_for_requirement(self, requirement: RequirementSpec, evidence: ImplementationEvidence, keywords: List[str],
+                                                  evidence_text: Optional[str] = None) -> float:
         """Helper method to calculate evidence score (simplified version)"""
-        evidence_text = f"{evidence.name} {evidence.content}".lower()
+        if evidence_text is None:
+            evidence_text = f"{evidence.name} {evidence.content}".lower()
         keyword_matches = sum(1 for keyword in keywords if keyword in evidence_text)
         
         if keywords:
             return keyword_matches / len(keywords)
         return 0.5
 
-def main():
+class StreamingReportWriter(CSVReportGenerator):
+    """Writes the CSV reports row by row while alignments are still being produced
+    
+    Matrix and detailed evidence rows are flushed as each alignment arrives,
+    so the files can be tailed during a long run; only the summary counters
+    are kept, and the summary is written when the writer is closed. The files
+    are identical to those CSVReportGenerator writes for the same alignments.
+    """
+    
+    def __init__(self, matrix_file: str = "requirement_alignment_matrix.csv",
+                 evidence_file: str = "detailed_evidence.csv",
+                 summary_file: str = "alignment_summary.csv"):
+        super().__init__([])
+        self.summary_file = summary_file
+        self.status_counts: Dict[str, int] = {}
+        self.category_stats: Dict[str, Dict[str, int]] = {}
+        self._matrix_csv = open(matrix_file, 'w', newline='', encoding='utf-8')
+        self._evidence_csv = open(evidence_file, 'w', newline='', encoding='utf-8')
+        self._matrix_writer = csv.DictWriter(self._matrix_csv, fieldnames=self.MATRIX_FIELDNAMES)
+        self._evidence_writer = csv.DictWriter(self._evidence_csv, fieldnames=self.EVIDENCE_FIELDNAMES)
+        self._matrix_writer.writeheader()
+        self._evidence_writer.writeheader()
+    
+    def write(self, alignment: RequirementAlignment):
+        """Write the rows of one alignment"""
+        self._matrix_writer.writerow(self._matrix_row(alignment))
+        self._evidence_writer.writerows(self._evidence_rows(alignment))
+        self._count_alignment(alignment, self.status_counts, self.category_stats)
+        self._matrix_csv.flush()
+        self._evidence_csv.flush()
+    
+    def close(self):
+        """Close the row files and write the summary"""
+        self._matrix_csv.close()
+        self._evidence_csv.close()
+        self._write_summary_csv(self.summary_file, self.status_counts, self.category_stats)
+    
+    def __enter__(self) -> 'StreamingReportWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+@dataclass
+class SessionUpdate:
+    """Changes picked up by one AlignmentSession refresh"""
+    specs_changed: bool = False
+    changed_files: List[str] = field(default_factory=list)
+    removed_files: List[str] = field(default_factory=list)
+    rematched: int = 0
+    
+    @property
+    def has_changes(self) -> bool:
+        return self.specs_changed or bool(self.changed_files) or bool(self.removed_files)
+
+class AlignmentSession:
+    """Keeps requirements, evidence and alignments in memory between runs
+    
+    After a full run, refresh() polls file mtimes and re-extracts only the
+    spec and source files that changed. Evidence of unchanged files is
+    carried over, together with its index entries. Requirements are re-matched
+    only when they changed, when one of their matched evidence items was
+    removed, or when new evidence is a candidate for them. The alignments are
+    identical to those of a full run over the same files.
+    """
+    
+    def __init__(self, spec_files: List[str], code_directories: List[str], jobs: int = 1,
+                 cache: Optional[EvidenceCache] = None, backend: str = "python",
+                 metrics: Optional[PipelineMetrics] = None, alignment_cache: Optional[AlignmentCache] = None,
+                 exclude: Optional[List[str]] = None, use_ignore_files: bool = True,
+                 max_file_size: Optional[int] = CodeAnalyzer.DEFAULT_MAX_FILE_SIZE,
+                 sqlite_file: Optional[str] = None, shard: Optional[Tuple[int, int]] = None):
+        self.spec_files = spec_files
+        self.sqlite_file = sqlite_file
+        self.analyzer = CodeAnalyzer(code_directories, jobs=jobs, cache=cache, metrics=metrics, exclude=exclude,
+                                     use_ignore_files=use_ignore_files, max_file_size=max_file_size,
+                                     shard=shard)
+        self.matcher = RequirementMatcher([], EvidenceStore(), backend=backend, metrics=metrics,
+                                          cache=alignment_cache, jobs=jobs)
+        self.requirements: List[RequirementSpec] = []
+        self.evidence = EvidenceStore()
+        self.alignments: List[RequirementAlignment] = []
+        self.spec_stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.file_stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+    
+    @staticmethod
+    def _stamp(file_path: str) -> Optional[Tuple[int, int]]:
+        """Return the (mtime_ns, size) pair used to detect a changed file"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def extract_requirements(self) -> List[RequirementSpec]:
+        """Extract requirements from every spec file"""
+        self.spec_stamps = {spec_file: self._stamp(spec_file) for spec_file in self.spec_files}
+        self.requirements = RequirementExtractor(self.spec_files).extract_requirements()
+        self.matcher.requirements = self.requirements
+        return self.requirements
+    
+    def analyze_codebase(self, pipelined: bool = False) -> EvidenceStore:
+        """Extract evidence from every source file
+        
+        With ``pipelined``, files are analyzed on a producer thread (see
+        prefetch()) while this thread indexes each file's evidence as it
+        arrives, instead of indexing everything once the scan is done.
+        """
+        file_paths = self.analyzer.collect_files()
+        # Stamp before reading so an edit made during the scan is seen by the next refresh
+        self.file_stamps = {file_path: self._stamp(file_path) for file_path in file_paths}
+        
+        if pipelined:
+            evidence = EvidenceStore()
+            index = EvidenceIndex(evidence)
+            for file_path, file_evidence in prefetch(self.analyzer.iter_file_evidence(file_paths)):
+                evidence.add_file(file_path, file_evidence)
+                index.update()
+            if self.analyzer.cache is not None:
+                self.analyzer.cache.prune(file_paths)
+                self.analyzer.cache.save()
+            self.analyzer.evidence = evidence
+        else:
+            evidence = self.analyzer.analyze_codebase(file_paths)
+            index = None
+        
+        self.evidence = evidence
+        self.matcher.evidence = evidence
+        self.matcher.index = index
+        return self.evidence
+    
+    def load_snapshot(self, *snapshot_files: str) -> Tuple[List[RequirementSpec], EvidenceStore]:
+        """Take requirements and evidence from a snapshot instead of extracting them
+        
+        Several snapshots are merged as the shards of one scan (see
+        EvidenceSnapshot.merge()). Nothing is stamped, so a later refresh()
+        re-extracts everything from disk.
+        """
+        self.requirements, self.evidence = EvidenceSnapshot.merge(list(snapshot_files))
+        self.spec_stamps = {}
+        self.file_stamps = {}
+        # The evidence is complete and in walk order, whatever shard the analyzer is set to
+        self.analyzer.shard = None
+        self.analyzer.file_ranks = {}
+        self.analyzer.evidence = self.evidence
+        self.matcher.requirements = self.requirements
+        self.matcher.evidence = self.evidence
+        self.matcher.index = None
+        return self.requirements, self.evidence
+    
+    def write_snapshot(self, snapshot_file: str):
+        """Write the current requirements and evidence to a snapshot, as a shard when the scan was sharded"""
+        if self.analyzer.shard is None:
+            EvidenceSnapshot.write(snapshot_file, self.requirements, self.evidence)
+        else:
+            EvidenceSnapshot.write(snapshot_file, self.requirements, self.evidence,
+                                   shard=self.analyzer.shard, file_ranks=self.analyzer.file_ranks)
+    
+    def write_alignment_shard(self, shard_file: str, shard: Tuple[int, int] = (1, 1)) -> int:
+        """Match the requirements of one shard and write their matches; returns how many were matched"""
+        positions = AlignmentShard.positions(len(self.requirements), shard)
+        alignments = self.matcher.match_requirements([self.requirements[position] for position in positions])
+        if self.matcher.cache is not None:
+            self.matcher.cache.save()
+        
+        matches = {
+            position: [(evidence.index, score) for evidence, score in zip(alignment.evidence, alignment.evidence_scores)]
+            for position, alignment in zip(positions, alignments)
+        }
+        AlignmentShard.write(shard_file, shard, AlignmentShard.fingerprint(self.requirements, self.evidence), matches)
+        return len(matches)
+    
+    def merge_alignment_shards(self, shard_files: List[str]) -> List[RequirementAlignment]:
+        """Build every alignment from the matches of all requirement shards instead of matching"""
+        matches = AlignmentShard.merge(shard_files, AlignmentShard.fingerprint(self.requirements, self.evidence))
+        missing = [self.requirements[position].id for position in range(len(self.requirements))
+                   if position not in matches]
+        if missing:
+            raise ValueError(f"alignment shards have no matches for {len(missing)} requirements, e.g. {missing[0]}")
+        
+        self.alignments = [
+            self.matcher._build_alignment(requirement, self.matcher._extract_keywords_from_requirement(requirement),
+                                          matches[position])
+            for position, requirement in enumerate(self.requirements)
+        ]
+        self.matcher.alignments = self.alignments
+        return self.alignments
+    
+    def match(self) -> List[RequirementAlignment]:
+        """Match every requirement to the evidence"""
+        self.alignments = self.matcher.match_requirements_to_evidence()
+        return self.alignments
+    
+    def match_and_write_reports(self) -> List[RequirementAlignment]:
+        """Match every requirement, writing its report rows as soon as its alignment is ready"""
+        with StreamingReportWriter() as reports:
+            for alignment in self.matcher.iter_alignments():
+                reports.write(alignment)
+        self.alignments = self.matcher.alignments
+        if self.sqlite_file:
+            # The database is replaced as a whole, so it is written once all alignments are in
+            CSVReportGenerator(self.alignments).generate_sqlite(self.sqlite_file, self.evidence)
+        return self.alignments
+    
+    def write_reports(self):
+        """Write the matrix, detailed evidence and summary CSVs (and the SQLite database, if set)"""
+        report_generator = CSVReportGenerator(self.alignments)
+        report_generator.generate_matrix_csv()
+        report_generator.generate_detailed_evidence_csv()
+        report_generator.generate_summary_csv()
+        if self.sqlite_file:
+            report_generator.generate_sqlite(self.sqlite_file, self.evidence)
+    
+    def refresh(self, force_files: Tuple[str, ...] = ()) -> SessionUpdate:
+        """Pick up spec and source changes on disk and update the alignments
+        
+        Files in ``force_files`` are re-extracted even if their stamp is unchanged.
+        """
+        spec_stamps = {spec_file: self._stamp(spec_file) for spec_file in self.spec_files}
+        file_paths = self.analyzer.collect_files()
+        file_stamps = {file_path: self._stamp(file_path) for file_path in file_paths}
+        
+        update = SessionUpdate(
+            specs_changed=spec_stamps != self.spec_stamps,
+            changed_files=[
+                file_path for file_path in file_paths
+                if file_stamps[file_path] != self.file_stamps.get(file_path) or file_path in force_files
+            ],
+            removed_files=[file_path for file_path in self.file_stamps if file_path not in file_stamps]
+        )
+        if not update.has_changes:
+            return update
+        
+        if update.specs_changed:
+            self.spec_stamps = spec_stamps
+            requirements = RequirementExtractor(self.spec_files).extract_requirements()
+        else:
+            requirements = self.requirements
+        
+        position_map = self._update_evidence(file_paths, update.changed_files, update.removed_files)
+        self.file_stamps = file_stamps
+        
+        self.alignments, update.rematched = self._update_alignments(requirements, position_map,
+                                                                    update.changed_files)
+        self.requirements = requirements
+        self.matcher.requirements = requirements
+        self.matcher.alignments = self.alignments
+        return update
+    
+    def _update_evidence(self, file_paths: List[str], changed_files: List[str],
+                         removed_files: List[str]) -> List[int]:
+        """Rebuild the evidence store and index, re-extracting only changed files
+        
+        Returns the map from old evidence positions to new ones (-1 if dropped).
+        """
+        for file_path in changed_files + removed_files:
+            source_lines.invalidate(file_path)
+        
+        old_evidence = self.evidence
+        old_index = self.matcher._get_evidence_index()
+        changed = set(changed_files)
+        changed_evidence = self.analyzer._analyze_files(changed_files)
+        
+        # Rebuild in walk order so positions, and with them score ties, match a full run
+        evidence = EvidenceStore()
+        position_map = array('l', [-1]) * len(old_evidence)
+        for file_path in file_paths:
+            if file_path in changed:
+                evidence.copy_file(changed_evidence, file_path)
+                continue
+            evidence.copy_file(old_evidence, file_path)
+            old_start, old_end = old_evidence.file_ranges.get(file_path, (0, 0))
+            new_start = evidence.file_ranges[file_path][0]
+            for offset in range(old_end - old_start):
+                position_map[old_start + offset] = new_start + offset
+        
+        if self.analyzer.cache is not None:
+            self.analyzer.cache.prune(file_paths)
+            self.analyzer.cache.save()
+        
+        self.evidence = evidence
+        self.analyzer.evidence = evidence
+        self.matcher.evidence = evidence
+        self.matcher.index = EvidenceIndex(evidence, previous=(old_index, position_map))
+        return position_map
+    
+    def _update_alignments(self, requirements: List[RequirementSpec], position_map: List[int],
+                           changed_files: List[str]) -> Tuple[List[RequirementAlignment], int]:
+        """Carry over alignments the changes cannot affect and re-match the rest"""
+        matcher = self.matcher
+        index = matcher.index
+        previous = {alignment.requirement.id: alignment for alignment in self.alignments}
+        
+        # A small index over just the new evidence tells which requirements it is a candidate for
+        added_positions = []
+        for file_path in changed_files:
+            start, end = self.evidence.file_ranges[file_path]
+            added_positions.extend(range(start, end))
+        added_index = EvidenceIndex([self.evidence[idx] for idx in added_positions])
+        
+        alignments: List[Optional[RequirementAlignment]] = []
+        rematch = []
+        merged_count = 0
+        for requirement in requirements:
+            alignment = previous.get(requirement.id)
+            if (alignment is None or alignment.requirement != requirement
+                    or any(position_map[ev.index] < 0 for ev in alignment.evidence)):
+                rematch.append(len(alignments))
+                alignments.append(None)
+                continue
+            
+            # The old matches are still the best of the unchanged evidence; merge
+            # them with any new evidence that clears the threshold
+            matches = [(position_map[ev.index], score)
+                       for ev, score in zip(alignment.evidence, alignment.evidence_scores)]
+            new_matches = []
+            for local in added_index.candidates(alignment.keywords, _word_set(requirement.text)):
+                idx = added_positions[local]
+                score = matcher._calculate_evidence_score(requirement, self.evidence[idx], alignment.keywords,
+                                                          index.evidence_texts[idx], index.context_texts[idx])
+                if score > 0.3:  # Threshold for relevance
+                    new_matches.append((idx, score))
+            
+            if new_matches:
+                merged = sorted(matches + new_matches, key=lambda match: (-match[1], match[0]))[:10]
+                alignments.append(matcher._build_alignment(requirement, alignment.keywords, merged))
+                merged_count += 1
+            else:
+                alignments.append(replace(alignment, evidence=[self.evidence[idx] for idx, score in matches]))
+        
+        for position, alignment in zip(rematch, matcher.match_requirements([requirements[i] for i in rematch])):
+            alignments[position] = alignment
+        
+        return alignments, len(rematch) + merged_count
+
+def watch_session(session: AlignmentSession, interval: float = 1.0):
+    """Poll for changes and rewrite the CSV reports whenever something changed"""
+    print(f"\n👀 Watching specs and source files for changes every {interval:g}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            started = time.perf_counter()
+            update = session.refresh()
+            if not update.has_changes:
+                continue
+            session.write_reports()
+            
+            changes = [os.path.basename(file_path) for file_path in update.changed_files + update.removed_files]
+            if update.specs_changed:
+                changes.insert(0, "specs")
+            print(f"   🔁 {', '.join(changes)}: re-matched {update.rematched} of {len(session.alignments)} "
+                  f"requirements, reports updated in {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching.")
+
+class _AlignmentRequestHandler(socketserver.StreamRequestHandler):
+    """Answers JSON-lines requests on one client connection"""
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.alignment_server.handle_line(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class AlignmentServer:
+    """Answers alignment queries from a warm AlignmentSession over a local socket
+    
+    Clients send one JSON object per line and get one JSON object back per line:
+    
+    - {"op": "alignment", "id": "US_1a2b3c4d"}: the alignment of a requirement
+    - {"op": "location", "file": "script.js", "line": 231}: the requirements
+      whose matched evidence is defined at, or has context around, that line
+    - {"op": "rescan", "file": "script.js"}: re-extract a file and update the
+      alignments; without "file", every spec and source change is picked up
+    - {"op": "ping"}
+    
+    Responses carry "ok": true and the result, or "ok": false and an "error".
+    Relative paths are resolved against the server's working directory.
+    Requests are answered one at a time, so a rescan never races a query.
+    Rescans run on handler threads, and forking a multi-threaded process
+    can deadlock the child, so the session's worker pools are turned off.
+    """
+    
+    def __init__(self, session: AlignmentSession, address: str = "localhost:8765"):
+        session.analyzer.jobs = 1
+        session.matcher.jobs = 1
+        self.session = session
+        self.address = address
+        self.server = None
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, List[RequirementAlignment]] = {}
+        self._by_file: Dict[str, List[Tuple[RequirementAlignment, int]]] = {}
+        self._build_lookups()
+    
+    def _build_lookups(self):
+        """Index the session's alignments by requirement id and by evidence file"""
+        self._by_id = {}
+        self._by_file = {}
+        for alignment in self.session.alignments:
+            self._by_id.setdefault(alignment.requirement.id, []).append(alignment)
+            for position, evidence in enumerate(alignment.evidence):
+                self._by_file.setdefault(os.path.realpath(evidence.file_path), []).append((alignment, position))
+    
+    def handle_line(self, line: bytes) -> Dict:
+        """Decode one request line and return the response"""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {'ok': False, 'error': f"invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "request must be a JSON object"}
+        return self.handle_request(request)
+    
+    def handle_request(self, request: Dict) -> Dict:
+        """Dispatch a decoded request to its handler"""
+        handlers = {
+            'alignment': self._handle_alignment,
+            'location': self._handle_location,
+            'rescan': self._handle_rescan,
+            'ping': lambda request: {}
+        }
+        handler = handlers.get(request.get('op'))
+        if handler is None:
+            return {'ok': False, 'error': f"unknown op: {request.get('op')!r}"}
+        
+        with self._lock:
+            try:
+                result = handler(request)
+            except KeyError as e:
+                return {'ok': False, 'error': f"missing field: {e}"}
+            except (TypeError, ValueError, OSError) as e:
+                # OSError covers files deleted or made unreadable under a rescan
+                return {'ok': False, 'error': str(e)}
+        return {'ok': True, **result}
+    
+    def _handle_alignment(self, request: Dict) -> Dict:
+        """Return the alignments of a requirement id (ids are content hashes and may repeat)"""
+        alignments = self._by_id.get(request['id'])
+        if not alignments:
+            raise ValueError(f"no requirement with id {request['id']!r}")
+        return {'alignments': [self._alignment_record(alignment) for alignment in alignments]}
+    
+    def _handle_location(self, request: Dict) -> Dict:
+        """Return the requirements matched by evidence at a file line, best score first"""
+        line = int(request['line'])
+        matches = []
+        for alignment, position in self._by_file.get(os.path.realpath(request['file']), ()):
+            evidence = alignment.evidence[position]
+            start, end = evidence.context_span
+            if evidence.line_number == line or start < line <= end:
+                matches.append({
+                    'requirement': self._requirement_record(alignment.requirement),
+                    'status': alignment.status.value,
+                    'score': alignment.evidence_scores[position],
+                    'evidence': self._evidence_record(evidence)
+                })
+        matches.sort(key=lambda match: -match['score'])
+        return {'requirements': matches}
+    
+    def _handle_rescan(self, request: Dict) -> Dict:
+        """Refresh the session, forcing one file to be re-extracted if given"""
+        force_files = ()
+        if request.get('file') is not None:
+            known_files = {os.path.realpath(path): path for path in self.session.analyzer.collect_files()}
+            file_path = known_files.get(os.path.realpath(request['file']))
+            if file_path is None:
+                raise ValueError(f"{request['file']!r} is not part of the scanned directories")
+            force_files = (file_path,)
+        
+        update = self.session.refresh(force_files=force_files)
+        if update.has_changes:
+            self._build_lookups()
+        return {'update': asdict(update)}
+    
+    @staticmethod
+    def _requirement_record(requirement: RequirementSpec) -> Dict:
+        """JSON fields identifying a requirement"""
+        return {'id': requirement.id, 'text': requirement.text, 'category': requirement.category}
+    
+    @staticmethod
+    def _evidence_record(evidence: ImplementationEvidence) -> Dict:
+        """JSON fields locating a piece of evidence"""
+        return {
+            'file': evidence.file_path,
+            'line': evidence.line_number,
+            'type': evidence.code_type,
+            'name': evidence.name
+        }
+    
+    def _alignment_record(self, alignment: RequirementAlignment) -> Dict:
+        """JSON form of an alignment, with each evidence item's score"""
+        return {
+            'requirement': self._requirement_record(alignment.requirement),
+            'status': alignment.status.value,
+            'confidence': alignment.confidence_score,
+            'coverage': alignment.coverage_percentage,
+            'notes': alignment.notes,
+            'evidence': [
+                dict(self._evidence_record(evidence), score=score)
+                for evidence, score in zip(alignment.evidence, alignment.evidence_scores)
+            ]
+        }
+    
+    def start(self) -> str:
+        """Bind the socket and return a printable address; use serve_forever() to answer requests"""
+        if self.address.startswith('unix:'):
+            path = self.address[len('unix:'):]
+            if os.path.exists(path):
+                os.remove(path)  # Left behind by a server that did not shut down cleanly
+            self.server = socketserver.ThreadingUnixStreamServer(path, _AlignmentRequestHandler)
+            self.server.daemon_threads = True
+            bound = f"unix:{path}"
+        else:
+            host, _, port = self.address.rpartition(':')
+            self.server = _ThreadingTCPServer((host or 'localhost', int(port)), _AlignmentRequestHandler)
+            bound = f"{self.server.server_address[0]}:{self.server.server_address[1]}"
+        self.server.alignment_server = self
+        return bound
+    
+    def serve_forever(self):
+        """Answer requests until shutdown() is called"""
+        self.server.serve_forever()
+    
+    def shutdown(self):
+        """Stop serve_forever() from another thread and release the socket"""
+        self.server.shutdown()
+        self.close()
+    
+    def close(self):
+        """Release the socket, removing a Unix socket file"""
+        self.server.server_close()
+        if self.address.startswith('unix:'):
+            try:
+                os.remove(self.address[len('unix:'):])
+            except OSError:
+                pass
+
+def serve_session(session: AlignmentSession, address: str):
+    """Answer alignment queries on a local socket until interrupted"""
+    server = AlignmentServer(session, address)
+    bound = server.start()
+    print(f"\n🛰️  Serving alignment queries on {bound} (JSON lines, Ctrl+C to stop)...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped.")
+    finally:
+        server.close()
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a K/N shard spec into (K, N)"""
+    match = re.fullmatch(r'(\d+)/(\d+)', value.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected K/N with 1 <= K <= N, got {value!r}")
+    return int(match.group(1)), int(match.group(2))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Requirement-to-code alignment analysis")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="number of worker processes used to scan source files and, with the python "
+                             "backend, to match requirements (default: 1)")
+    parser.add_argument('--cache-dir', default=".rtcache",
+                        help="directory for the incremental evidence and alignment caches (default: .rtcache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-parse every source file and re-score every requirement instead of using the caches")
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help="gitignore-style rule for paths to leave out of the scan; may be repeated, and "
+                             "'!GLOB' re-includes a default exclude such as node_modules/")
+    parser.add_argument('--no-ignore-files', action='store_true',
+                        help="do not honor .gitignore and .rtignore files in the scanned directories")
+    parser.add_argument('--max-file-size', type=int, default=CodeAnalyzer.DEFAULT_MAX_FILE_SIZE, metavar='BYTES',
+                        help="skip source files larger than this; 0 disables the limit (default: 1048576)")
+    parser.add_argument('--backend', choices=RequirementMatcher.BACKENDS, default="python",
+                        help="requirement scoring backend; numpy falls back to python when unavailable (default: python)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--watch', action='store_true',
+                      help="keep running and update the reports whenever a spec or source file changes")
+    mode.add_argument('--serve', nargs='?', const="localhost:8765", metavar='ADDRESS',
+                      help="keep the index warm and answer JSON-lines queries on HOST:PORT or unix:PATH "
+                           "(default: localhost:8765)")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="seconds between change polls in --watch mode (default: 1.0)")
+    parser.add_argument('--stream', action='store_true',
+                        help="pipeline the run: index files while later ones are still being analyzed and "
+                             "write report rows as requirements are matched")
+    parser.add_argument('--sqlite', nargs='?', const="alignments.db", metavar='FILE',
+                        help="also write requirements, evidence and alignments to a SQLite database "
+                             "(default: alignments.db)")
+    parser.add_argument('--write-snapshot', metavar='FILE',
+                        help="write the extracted requirements and evidence to a binary snapshot")
+    parser.add_argument('--from-snapshot', nargs='+', metavar='FILE',
+                        help="load requirements and evidence from a snapshot instead of scanning specs and source; "
+                             "the snapshots of every shard of a sharded scan are merged")
+    parser.add_argument('--shard', type=parse_shard, metavar='K/N',
+                        help="process only shard K of N: scan the source files assigned to it by path hash "
+                             "and stop after --write-snapshot, or, with --from-snapshot, match every Nth "
+                             "requirement and stop after --write-alignments")
+    parser.add_argument('--write-alignments', metavar='FILE',
+                        help="with --from-snapshot, write the matches of the requirements of --shard (default: "
+                             "all) to FILE and stop")
+    parser.add_argument('--merge-alignments', nargs='+', metavar='FILE',
+                        help="with --from-snapshot, build the reports from the --write-alignments files of "
+                             "every requirement shard instead of matching")
+    parser.add_argument('--metrics', action='store_true',
+                        help="write stage timings and counters to metrics.json and metrics.csv")
+    parser.add_argument('--profile', nargs='?', const="profiles", metavar='DIR',
+                        help="run each stage under cProfile and write <stage>.prof files to DIR "
+                             "(default: profiles), along with the --metrics files; worker processes "
+                             "of --jobs are not profiled")
+    args = parser.parse_args(argv)
+    if (args.write_alignments or args.merge_alignments) and not args.from_snapshot:
+        parser.error("--write-alignments and --merge-alignments need the evidence of --from-snapshot")
+    if args.write_alignments and args.merge_alignments:
+        parser.error("--write-alignments and --merge-alignments are separate steps")
+    if args.shard and not (args.write_alignments if args.from_snapshot else args.write_snapshot):
+        parser.error("--shard needs --write-snapshot when scanning, or --write-alignments with --from-snapshot")
+    if (args.shard or args.write_alignments) and (args.watch or args.serve):
+        parser.error("--shard and --write-alignments run a single step and cannot be combined with "
+                     "--watch or --serve")
+    return args
+
+def main(argv: Optional[List[str]] = None):
     """Main execution function"""
+    args = parse_args(argv)
     print("🔍 Starting Requirement-to-Code Alignment Analysis...")
     
     # Configuration
@@ -940,22 +3851,94 @@ def main():
         "./Deadline-MPE"
     ]
     
-    # Step 1: Extract Requirements
-    print("📋 Extracting requirements from specifications...")
-    req_extractor = RequirementExtractor(spec_files)
-    requirements = req_extractor.extract_requirements()
-    print(f"   Found {len(requirements)} requirements")
+    cache_dir = args.cache_dir
+    if args.shard:
+        # Each shard prunes its caches to its own files and requirements, so shards keep separate caches
+        cache_dir = os.path.join(cache_dir, "shard-{}-of-{}".format(*args.shard))
+    
+    metrics = PipelineMetrics(profile_dir=args.profile)
+    evidence_cache = None if args.no_cache else EvidenceCache(cache_dir).load()
+    alignment_cache = None if args.no_cache else AlignmentCache(cache_dir).load()
+    session = AlignmentSession(spec_files, code_directories, jobs=args.jobs,
+                               cache=evidence_cache, backend=args.backend, metrics=metrics,
+                               alignment_cache=alignment_cache, exclude=args.exclude,
+                               use_ignore_files=not args.no_ignore_files,
+                               max_file_size=args.max_file_size or None, sqlite_file=args.sqlite,
+                               shard=None if args.from_snapshot else args.shard)
+    
+    if args.from_snapshot:
+        # Steps 1 and 2 come from an earlier run
+        print(f"📦 Loading requirements and evidence from {', '.join(args.from_snapshot)}...")
+        try:
+            with metrics.stage('load'):
+                requirements, evidence = session.load_snapshot(*args.from_snapshot)
+        except ValueError as e:
+            raise SystemExit(f"❌ {e}")
+        print(f"   Found {len(requirements)} requirements")
+        print(f"   Found {len(evidence)} pieces of evidence")
+    else:
+        # Step 1: Extract Requirements
+        print("📋 Extracting requirements from specifications...")
+        with metrics.stage('extract'):
+            requirements = session.extract_requirements()
+        print(f"   Found {len(requirements)} requirements")
+        
+        # Step 2: Analyze Codebase
+        if args.shard:
+            print("🔬 Analyzing shard {}/{} of the codebase for implementation evidence...".format(*args.shard))
+        else:
+            print("🔬 Analyzing codebase for implementation evidence...")
+        with metrics.stage('analyze'):
+            evidence = session.analyze_codebase(pipelined=args.stream)
+        print(f"   Found {len(evidence)} pieces of evidence")
+        if evidence_cache is not None:
+            print(f"   Reused cached evidence for {evidence_cache.hits} files, parsed {evidence_cache.misses}")
+        skipped = Counter(session.analyzer.skipped_files.values())
+        if skipped:
+            print(f"   Skipped {sum(skipped.values())} files: " +
+                  ", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items())))
+        long_lines = metrics.counters.get('analyze', {}).get('long_lines_skipped', 0)
+        if long_lines:
+            print(f"   Skipped {long_lines} lines longer than {MAX_LINE_LENGTH} characters")
+        for file_path, seconds in metrics.slowest_files(1):
+            if seconds >= 1.0:
+                print(f"   Slowest file: {file_path} ({seconds:.2f}s)")
+    
+    if args.write_snapshot:
+        session.write_snapshot(args.write_snapshot)
+        print(f"   📄 Generated: {args.write_snapshot}")
+    
+    if args.write_alignments:
+        # Requirement shard: only matches are written; --merge-alignments turns them into reports
+        shard = args.shard or (1, 1)
+        print("🎯 Matching requirement shard {}/{} to implementation evidence...".format(*shard))
+        with metrics.stage('match'):
+            matched = session.write_alignment_shard(args.write_alignments, shard)
+        print(f"   Matched {matched} requirements")
+        print(f"   📄 Generated: {args.write_alignments}")
     
-    # Step 2: Analyze Codebase
-    print("🔬 Analyzing codebase for implementation evidence...")
-    code_analyzer = CodeAnalyzer(code_directories)
-    evidence = code_analyzer.analyze_codebase()
-    print(f"   Found {len(evidence)} pieces of evidence")
+    if args.shard or args.write_alignments:
+        if args.metrics or args.profile:
+            metrics.write()
+            print("   📄 Generated: metrics.json, metrics.csv")
+        print("\n🧩 Shard complete! Merge every shard's output with --from-snapshot / --merge-alignments.")
+        return
     
     # Step 3: Match Requirements to Evidence
     print("🎯 Matching requirements to implementation evidence...")
-    matcher = RequirementMatcher(requirements, evidence)
-    alignments = matcher.match_requirements_to_evidence()
+    with metrics.stage('match'):
+        if args.merge_alignments:
+            try:
+                alignments = session.merge_alignment_shards(args.merge_alignments)
+            except ValueError as e:
+                raise SystemExit(f"❌ {e}")
+        elif args.stream:
+            # Report rows are written while matching, so there is no separate report stage
+            alignments = session.match_and_write_reports()
+        else:
+            alignments = session.match()
+    if alignment_cache is not None and not args.merge_alignments:
+        print(f"   Reused cached alignments for {alignment_cache.hits} requirements, scored {alignment_cache.misses}")
     
     # Calculate summary statistics
     status_counts = {}
@@ -970,19 +3953,20 @@ def main():
     
     # Step 4: Generate CSV Reports
     print("📊 Generating CSV reports...")
-    report_generator = CSVReportGenerator(alignments)
-    
-    # Generate main matrix
-    report_generator.generate_matrix_csv()
+    if not args.stream or args.merge_alignments:
+        with metrics.stage('report'):
+            session.write_reports()
     print("   📄 Generated: requirement_alignment_matrix.csv")
-    
-    # Generate detailed evidence
-    report_generator.generate_detailed_evidence_csv()
     print("   📄 Generated: detailed_evidence.csv")
-    
-    # Generate summary
-    report_generator.generate_summary_csv()
     print("   📄 Generated: alignment_summary.csv")
+    if args.sqlite:
+        print(f"   📄 Generated: {args.sqlite}")
+    
+    if args.metrics or args.profile:
+        metrics.write()
+        print("   📄 Generated: metrics.json, metrics.csv")
+    if args.profile:
+        print(f"   📄 Profiles written to {args.profile}/")
     
     print("\n🎉 Analysis complete! Check the generated CSV files for detailed results.")
     
@@ -997,6 +3981,11 @@ def main():
     print(f"   Total Evidence: {len(evidence)}")
     total_impl_rate = (status_counts.get('Implemented', 0) / len(requirements) * 100) if requirements else 0
     print(f"   Overall Implementation Rate: {total_impl_rate:.1f}%")
+    
+    if args.watch:
+        watch_session(session, args.interval)
+    elif args.serve:
+        serve_session(session, args.serve)
 
 if __name__ == "__main__":
     main()
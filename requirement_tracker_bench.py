@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for requirement_tracker.py
+
+Generates synthetic PROJECT_SPEC.md-style specifications and JS/HTML/CSS/Py
+source trees at configurable sizes, times each pipeline stage and writes the
+results to a JSON file that can be compared across versions:
+
+    python requirement_tracker_bench.py --scales 1,10 --output before.json
+    python requirement_tracker_bench.py --scales 1,10 --compare before.json
+
+The generator is seeded, so the same options always produce the same inputs.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Callable
+
+import requirement_tracker as rt
+
+RESULTS_VERSION = 1
+
+# Vocabulary mixing the tracker's domain keywords with filler words, so the
+# synthetic specs and code share enough terms to produce realistic matches
+DOMAIN_WORDS = [
+    'task', 'item', 'todo', 'deadline', 'habit', 'routine', 'daily', 'streak',
+    'completion', 'zombie', 'enemy', 'base', 'health', 'attack', 'button',
+    'form', 'input', 'display', 'element', 'level', 'points', 'upgrade',
+    'unlock', 'category', 'timer', 'animation', 'canvas', 'event', 'progress'
+]
+FILLER_WORDS = [
+    'panel', 'record', 'queue', 'widget', 'layout', 'profile', 'settings',
+    'report', 'history', 'reward', 'badge', 'theme', 'sound', 'modal',
+    'filter', 'search', 'calendar', 'reminder', 'session', 'summary'
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tor', 'vex', 'sul', 'dra', 'pin', 'qua', 'zet', 'bor', 'nim', 'fal']
+ACTORS = ['user', 'player', 'new user', 'returning player', 'admin']
+SECTION_SUFFIXES = ['System', 'Management', 'Mechanics', 'Interface', 'Engine', 'Progression']
+
+@dataclass
+class BenchmarkSize:
+    """Input sizes for one benchmark run"""
+    user_stories: int
+    feature_sections: int
+    features_per_section: int
+    technical_lines: int
+    source_files: int
+    items_per_file: int
+    
+    @classmethod
+    def at_scale(cls, scale: float) -> 'BenchmarkSize':
+        """Sizes roughly matching this repository at scale 1"""
+        return cls(
+            user_stories=max(1, round(40 * scale)),
+            feature_sections=max(1, round(10 * scale)),
+            features_per_section=8,
+            technical_lines=max(1, round(40 * scale)),
+            source_files=max(1, round(20 * scale)),
+            items_per_file=90
+        )
+
+class SyntheticProjectGenerator:
+    """Writes a reproducible synthetic spec and codebase into a directory"""
+    
+    def __init__(self, seed: int = 0, vocabulary_size: int = 400):
+        self.rng = random.Random(seed)
+        # Made-up words keep the share of evidence matching any one keyword
+        # close to what a real codebase shows
+        made_up = sorted({
+            ''.join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 3)))
+            for _ in range(vocabulary_size)
+        })
+        self.vocabulary = FILLER_WORDS + made_up
+    
+    def _words(self, count: int) -> List[str]:
+        """Pick words, a quarter of them domain keywords"""
+        return [
+            self.rng.choice(DOMAIN_WORDS if self.rng.random() < 0.25 else self.vocabulary)
+            for _ in range(count)
+        ]
+    
+    def _identifier(self, count: int = 3) -> str:
+        """Return a camelCase identifier"""
+        words = self._words(count)
+        return words[0] + ''.join(word.capitalize() for word in words[1:])
+    
+    def generate_spec(self, size: BenchmarkSize) -> str:
+        """Return a markdown specification with stories, feature sections and technical lines"""
+        lines = ["# Synthetic Project Specification", "", "## Overview", "",
+                 "Generated for benchmarking the requirement tracker.", "", "## User Stories", ""]
+        
+        for _ in range(size.user_stories):
+            story = f"* As a {self.rng.choice(ACTORS)}, I want to {' '.join(self._words(5))}"
+            if self.rng.random() < 0.5:
+                story += f" so that {' '.join(self._words(4))}"
+            lines.append(story)
+            if self.rng.random() < 0.3:
+                lines.append(f"  The {self.rng.choice(['button', 'form', 'element'])} calls a function "
+                             f"named {self._identifier()}.")
+        lines.append("")
+        
+        for section in range(size.feature_sections):
+            title = f"{' '.join(self._words(2)).title()} {self.rng.choice(SECTION_SUFFIXES)} {section}"
+            # A feature section header must be directly followed by another header
+            lines.extend([f"## {title}", "### Requirements", ""])
+            for _ in range(size.features_per_section):
+                lines.append(f"- {' '.join(self._words(self.rng.randint(5, 10))).capitalize()}")
+            lines.append("")
+        
+        lines.extend(["## Technical Constraints", ""])
+        for i in range(size.technical_lines):
+            prefix = self.rng.choice(['Performance', 'Storage', 'Data', 'Speed', 'Persistence'])
+            lines.append(f"{prefix}: {' '.join(self._words(6))} within {i + 1} ms.")
+        lines.append("")
+        
+        return '\n'.join(lines)
+    
+    def _js_file(self, items: int) -> str:
+        lines = []
+        for _ in range(items):
+            kind = self.rng.random()
+            if kind < 0.45:
+                name = self._identifier()
+                lines.extend([f"function {name}({self._identifier(2)}) {{",
+                              f"    return {self._identifier(2)}.{self._identifier(1)};", "}"])
+            elif kind < 0.6:
+                lines.append(f"const {self._identifier()} = ({self._identifier(1)}) => {{ }};")
+            elif kind < 0.8:
+                name = '_'.join(self._words(3)).upper()
+                lines.append(f"const {name} = {self.rng.randint(1, 1000)};")
+            else:
+                lines.append(f"document.querySelector('#{'-'.join(self._words(2))}');")
+        return '\n'.join(lines) + '\n'
+    
+    def _html_file(self, items: int) -> str:
+        lines = ["<!DOCTYPE html>", "<html>", "<body>"]
+        for _ in range(items):
+            lines.append(f'<div id="{"-".join(self._words(2))}" class="{"-".join(self._words(2))} '
+                         f'{self._words(1)[0]}"></div>')
+        lines.extend(["</body>", "</html>"])
+        return '\n'.join(lines) + '\n'
+    
+    def _css_file(self, items: int) -> str:
+        lines = []
+        for _ in range(items):
+            prefix = self.rng.choice(['.', '#'])
+            lines.append(f"{prefix}{'-'.join(self._words(2))} {{ color: #{self.rng.randint(0, 0xffffff):06x}; }}")
+        return '\n'.join(lines) + '\n'
+    
+    def _py_file(self, items: int) -> str:
+        lines = []
+        for _ in range(items):
+            if self.rng.random() < 0.2:
+                lines.extend([f"class {self._identifier().capitalize()}:", "    pass", ""])
+            else:
+                lines.extend([f"def {'_'.join(self._words(3))}({self._words(1)[0]}):",
+                              f"    return {self._words(1)[0]}", ""])
+        return '\n'.join(lines) + '\n'
+    
+    def generate_codebase(self, root: str, size: BenchmarkSize) -> List[str]:
+        """Write source files under root, spread over nested directories"""
+        writers = [('js', self._js_file), ('js', self._js_file), ('html', self._html_file),
+                   ('css', self._css_file), ('py', self._py_file)]
+        file_paths = []
+        
+        for i in range(size.source_files):
+            extension, writer = writers[i % len(writers)]
+            directory = os.path.join(root, f"module_{i // 25:03d}")
+            os.makedirs(directory, exist_ok=True)
+            file_path = os.path.join(directory, f"{self._identifier(2)}_{i}.{extension}")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(writer(size.items_per_file))
+            file_paths.append(file_path)
+        
+        return file_paths
+    
+    def generate(self, directory: str, size: BenchmarkSize) -> str:
+        """Generate the spec and codebase, returning the spec path"""
+        spec_file = os.path.join(directory, "PROJECT_SPEC.md")
+        with open(spec_file, 'w', encoding='utf-8') as f:
+            f.write(self.generate_spec(size))
+        self.generate_codebase(os.path.join(directory, "src"), size)
+        return spec_file
+
+def _timed(function: Callable, repeat: int) -> Dict:
+    """Run function repeat times, returning its last result and wall/CPU timings"""
+    walls, cpus, result = [], [], None
+    for _ in range(repeat):
+        rt.source_lines.invalidate()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = function()
+        walls.append(time.perf_counter() - wall_start)
+        cpus.append(time.process_time() - cpu_start)
+    return {'result': result, 'wall': min(walls), 'cpu': min(cpus), 'wall_all': walls}
+
+def run_benchmark(directory: str, size: BenchmarkSize, repeat: int = 1, backend: str = "python",
+                  jobs: int = 1) -> Dict:
+    """Time every pipeline stage on the generated project in directory"""
+    spec_file = os.path.join(directory, "PROJECT_SPEC.md")
+    source_root = os.path.join(directory, "src")
+    report_dir = os.path.join(directory, "reports")
+    os.makedirs(report_dir, exist_ok=True)
+    
+    def generate_reports():
+        generator = rt.CSVReportGenerator(alignments)
+        generator.generate_matrix_csv(os.path.join(report_dir, "requirement_alignment_matrix.csv"))
+        generator.generate_detailed_evidence_csv(os.path.join(report_dir, "detailed_evidence.csv"))
+        generator.generate_summary_csv(os.path.join(report_dir, "alignment_summary.csv"))
+    
+    stages = {}
+    timing = _timed(lambda: rt.RequirementExtractor([spec_file]).extract_requirements(), repeat)
+    requirements = timing.pop('result')
+    stages['RequirementExtractor'] = timing
+    
+    timing = _timed(lambda: rt.CodeAnalyzer([source_root], jobs=jobs).analyze_codebase(), repeat)
+    evidence = timing.pop('result')
+    stages['CodeAnalyzer'] = timing
+    
+    timing = _timed(lambda: rt.RequirementMatcher(requirements, evidence, backend=backend)
+                    .match_requirements_to_evidence(), repeat)
+    alignments = timing.pop('result')
+    stages['RequirementMatcher'] = timing
+    
+    timing = _timed(generate_reports, repeat)
+    timing.pop('result')
+    stages['CSVReportGenerator'] = timing
+    
+    source_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(source_root) for name in files
+    )
+    return {
+        'size': asdict(size),
+        'counts': {
+            'requirements': len(requirements),
+            'evidence': len(evidence),
+            'matched_evidence': sum(len(alignment.evidence) for alignment in alignments),
+            'source_files': size.source_files,
+            'source_bytes': source_bytes,
+        },
+        'stages': stages,
+        'total_wall': sum(stage['wall'] for stage in stages.values()),
+    }
+
+def _git_revision() -> Optional[str]:
+    """Return the current git commit of the tracker, if available"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(rt.__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(baseline: Dict, results: Dict):
+    """Print per-stage speedups against a previous results file"""
+    previous_runs = {run['scale']: run for run in baseline.get('runs', [])}
+    print(f"\n⚖️  Compared with {baseline.get('git_revision') or 'baseline'}:")
+    for run in results['runs']:
+        previous = previous_runs.get(run['scale'])
+        if previous is None:
+            print(f"   scale {run['scale']:g}: no baseline run")
+            continue
+        for stage, timing in run['stages'].items():
+            before = previous['stages'].get(stage, {}).get('wall')
+            if before:
+                print(f"   scale {run['scale']:g} {stage:<22} {before:8.3f}s -> {timing['wall']:8.3f}s "
+                      f"({before / max(timing['wall'], 1e-9):.2f}x)")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the requirement tracker on synthetic projects")
+    parser.add_argument('--scales', default="1,10",
+                        help="comma separated size multipliers relative to this repository (default: 1,10)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the generator (default: 0)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="times each stage is run; the fastest run is reported (default: 1)")
+    parser.add_argument('--backend', choices=rt.RequirementMatcher.BACKENDS, default="python",
+                        help="requirement scoring backend (default: python)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="worker processes for CodeAnalyzer (default: 1)")
+    parser.add_argument('--output', default="bench_results.json", help="results file (default: bench_results.json)")
+    parser.add_argument('--compare', help="previous results file to compare against")
+    parser.add_argument('--keep', help="generate the synthetic projects in this directory and keep them")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    """Generate synthetic projects, time the pipeline and write the results"""
+    args = parse_args(argv)
+    scales = [float(scale) for scale in args.scales.split(',')]
+    results = {
+        'version': RESULTS_VERSION,
+        'git_revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': {'seed': args.seed, 'repeat': args.repeat, 'backend': args.backend, 'jobs': args.jobs},
+        'runs': [],
+    }
+    
+    base_directory = args.keep or tempfile.mkdtemp(prefix="rt_bench_")
+    try:
+        for scale in scales:
+            size = BenchmarkSize.at_scale(scale)
+            directory = os.path.join(base_directory, f"scale_{scale:g}")
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+            
+            print(f"🏗️  Generating scale {scale:g} project ({size.source_files} files, "
+                  f"{size.user_stories} user stories)...")
+            SyntheticProjectGenerator(args.seed).generate(directory, size)
+            
+            run = run_benchmark(directory, size, repeat=args.repeat, backend=args.backend, jobs=args.jobs)
+            run['scale'] = scale
+            results['runs'].append(run)
+            
+            counts = run['counts']
+            print(f"   {counts['requirements']} requirements, {counts['evidence']} pieces of evidence")
+            for stage, timing in run['stages'].items():
+                print(f"   ⏱️  {stage:<22} {timing['wall']:8.3f}s wall {timing['cpu']:8.3f}s cpu")
+    finally:
+        if not args.keep:
+            shutil.rmtree(base_directory, ignore_errors=True)
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
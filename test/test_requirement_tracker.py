@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+"""
+Tests for requirement_tracker.py
+
+Run from the repository root with: python -m unittest discover test
+"""
+
+import os
+import re
+import sys
+import json
+import socket
+import sqlite3
+import shutil
+import subprocess
+import threading
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requirement_tracker as rt
+
+SAMPLE_JS = """\
+const MAX_TASKS = 50;
+const DEFAULT_CATEGORY = 'career';
+
+function createTask(name, category) {
+    return { name, category, deadline: Date.now() };
+}
+
+function deleteTask(taskId) {
+    tasks = tasks.filter(task => task.id !== taskId);
+}
+
+const renderTaskList = () => {
+    document.querySelector('#task-list').innerHTML = '';
+};
+
+function updateZombieProgress(progress) {
+    zombie.style.left = progress + '%';
+}
+
+const categoryIcons = { career: 'briefcase', health: 'heart' };
+"""
+
+# Many equally scored functions, so top-10 selection has to break ties
+SAMPLE_BULK_JS = "".join(
+    f"function dueTaskItem{i}(todo) {{ return todo.deadline; }}\n" for i in range(15)
+)
+
+SAMPLE_HTML = """\
+<div id="task-list" class="task-container"></div>
+<button id="add-task" class="btn primary">Add Task</button>
+<div class="zombie-track"><img id="zombie" src="zombie.png"></div>
+"""
+
+SAMPLE_CSS = """\
+.task-container { display: flex; }
+#zombie { position: absolute; }
+.zombie-track { height: 40px; }
+.btn.primary { color: white; }
+"""
+
+SAMPLE_PY = """\
+class TaskStore:
+    def load_tasks(self):
+        return []
+
+def export_tasks(tasks):
+    return tasks
+"""
+
+REQUIREMENTS = [
+    rt.RequirementSpec("F1", "Users can create a task with a category and deadline", "Feature"),
+    rt.RequirementSpec("F2", "Tasks can be deleted from the task list", "Feature - Tasks"),
+    rt.RequirementSpec("US1", "As a user I want the zombie to show my deadline progress", "User Story"),
+    rt.RequirementSpec("T1", "Maximum number of tasks is limited by a constant", "Technical"),
+    rt.RequirementSpec("T2", "Task store loads and exports tasks", "Technical - Storage"),
+    rt.RequirementSpec("O1", "Category icons render for career and health", "Other"),
+    rt.RequirementSpec("F3", "Every task item has a deadline", "Feature"),
+    rt.RequirementSpec("E1", "Fly me to the moon", "Feature"),
+    rt.RequirementSpec("E2", "", "User Story"),
+]
+
+
+def alignment_key(alignment):
+    """Comparable summary of an alignment, including the matched evidence order"""
+    return (
+        alignment.requirement.id,
+        alignment.status,
+        alignment.confidence_score,
+        alignment.coverage_percentage,
+        alignment.notes,
+        [(ev.file_path, ev.line_number, ev.name) for ev in alignment.evidence],
+        alignment.evidence_scores,
+    )
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'requirement_tracker.py')
+
+
+def run_tracker(directory, *args):
+    """Run the command line tool in its own process with ``directory`` as the working directory"""
+    subprocess.run([sys.executable, SCRIPT] + list(args), cwd=directory, check=True,
+                      stdout=subprocess.DEVNULL)
+
+
+def write_files(directory, files):
+    """Write a {relative path: content} mapping or (path, content) pairs below a directory"""
+    for name, content in (files.items() if isinstance(files, dict) else files):
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def read_reports(directory):
+    """Contents of the three CSV reports written to a directory"""
+    contents = []
+    for name in ('requirement_alignment_matrix.csv', 'detailed_evidence.csv', 'alignment_summary.csv'):
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            contents.append(f.read())
+    return contents
+
+
+@unittest.skipIf(rt.np is None, "numpy is not installed")
+class VectorizedScorerParityTest(unittest.TestCase):
+    """The numpy backend must reproduce the pure-Python scorer exactly"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        samples = {
+            'tasks.js': SAMPLE_JS,
+            'copy.js': SAMPLE_JS,  # duplicate evidence produces score ties
+            'bulk.js': SAMPLE_BULK_JS,
+            'index.html': SAMPLE_HTML,
+            'style.css': SAMPLE_CSS,
+            'store.py': SAMPLE_PY,
+        }
+        write_files(cls.directory, samples)
+        cls.evidence = rt.CodeAnalyzer([cls.directory]).analyze_codebase()
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+    
+    def test_score_matrix_matches_scalar_scores(self):
+        matcher = rt.RequirementMatcher(REQUIREMENTS, self.evidence)
+        index = matcher._get_evidence_index()
+        scorer = rt.VectorizedScorer(index, matcher.TYPE_RELEVANCE_MAP, batch_size=3)
+        keyword_lists = [matcher._extract_keywords_from_requirement(req) for req in REQUIREMENTS]
+        
+        for start in range(0, len(REQUIREMENTS), 3):
+            scores = scorer.score_batch(REQUIREMENTS[start:start + 3], keyword_lists[start:start + 3])
+            for row, requirement in enumerate(REQUIREMENTS[start:start + 3]):
+                keywords = keyword_lists[start + row]
+                for idx, evidence in enumerate(self.evidence):
+                    expected = matcher._calculate_evidence_score(requirement, evidence, keywords)
+                    self.assertEqual(scores[row, idx], expected, (requirement.id, evidence.name))
+    
+    def test_alignments_match_python_backend(self):
+        expected = rt.RequirementMatcher(REQUIREMENTS, self.evidence).match_requirements_to_evidence()
+        actual = rt.RequirementMatcher(REQUIREMENTS, self.evidence, backend="numpy").match_requirements_to_evidence()
+        
+        self.assertTrue(any(len(alignment.evidence) == 10 for alignment in expected))
+        self.assertEqual([alignment_key(a) for a in actual], [alignment_key(a) for a in expected])
+    
+    def test_alignments_match_without_scipy(self):
+        expected = rt.RequirementMatcher(REQUIREMENTS, self.evidence).match_requirements_to_evidence()
+        sparse, rt.sparse = rt.sparse, None
+        try:
+            actual = rt.RequirementMatcher(REQUIREMENTS, self.evidence, backend="numpy").match_requirements_to_evidence()
+        finally:
+            rt.sparse = sparse
+        
+        self.assertEqual([alignment_key(a) for a in actual], [alignment_key(a) for a in expected])
+    
+    def test_batches_shrink_under_memory_cap(self):
+        matcher = rt.RequirementMatcher(REQUIREMENTS, self.evidence)
+        index = matcher._get_evidence_index()
+        keyword_lists = [matcher._extract_keywords_from_requirement(req) for req in REQUIREMENTS]
+        expected = rt.VectorizedScorer(index, matcher.TYPE_RELEVANCE_MAP).top_matches(REQUIREMENTS, keyword_lists)
+        
+        cap = rt.VectorizedScorer.MAX_BATCH_BYTES
+        rt.VectorizedScorer.MAX_BATCH_BYTES = 2 * rt.VectorizedScorer.BATCH_MATRICES * 8 * len(self.evidence)
+        try:
+            scorer = rt.VectorizedScorer(index, matcher.TYPE_RELEVANCE_MAP)
+        finally:
+            rt.VectorizedScorer.MAX_BATCH_BYTES = cap
+        
+        self.assertEqual(scorer.batch_size, 2)
+        self.assertEqual(scorer.top_matches(REQUIREMENTS, keyword_lists), expected)
+    
+    def test_pruned_top_k_matches_full_sort(self):
+        matcher = rt.RequirementMatcher(REQUIREMENTS, self.evidence)
+        index = matcher._get_evidence_index()
+        
+        for requirement in REQUIREMENTS:
+            keywords = matcher._extract_keywords_from_requirement(requirement)
+            candidates = index.candidates(keywords, rt._word_set(requirement.text))
+            scored = sorted(
+                ((matcher._calculate_evidence_score(requirement, self.evidence[idx], keywords), idx) for idx in candidates),
+                key=lambda item: (-item[0], item[1])
+            )
+            expected = [(idx, score) for score, idx in scored if score > 0.3][:10]
+            actual = matcher._score_candidates(requirement, keywords, candidates)
+            self.assertEqual([(idx, score) for idx, score in actual], expected, requirement.id)
+
+
+class EvidenceIndexTest(unittest.TestCase):
+    """Keyword lookups through the index must keep substring semantics"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('index.html', SAMPLE_HTML), ('store.py', SAMPLE_PY)))
+        self.evidence = rt.CodeAnalyzer([self.directory]).analyze_codebase()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_keyword_hits_match_substring_counts(self):
+        index = rt.EvidenceIndex(self.evidence)
+        matcher = rt.RequirementMatcher(REQUIREMENTS, self.evidence)
+        
+        for requirement in REQUIREMENTS:
+            keywords = matcher._extract_keywords_from_requirement(requirement) + ['ask', 'ask-l', 'zzz']
+            text_hits, context_hits = index.keyword_hits(keywords)
+            for idx in range(len(self.evidence)):
+                self.assertEqual(text_hits[idx], sum(k in index.evidence_texts[idx] for k in keywords))
+                self.assertEqual(context_hits[idx], sum(k in index.context_texts[idx] for k in keywords))
+
+
+class FileCollectionTest(unittest.TestCase):
+    """Excluded, ignored and unanalyzable files are left out of the walk"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        files = {
+            'tasks.js': SAMPLE_JS,
+            'app.min.js': SAMPLE_JS,
+            'bundle.js': 'var a=1;' * 500,
+            'image.py': 'def x():\0 pass\n',
+            'notes.md': '# Notes\n',
+            'node_modules/lib/index.js': SAMPLE_JS,
+            'build/out.js': SAMPLE_JS,
+            'src/store.py': SAMPLE_PY,
+            'src/generated/models.py': SAMPLE_PY,
+            'src/generated/keep.py': SAMPLE_PY,
+            '.gitignore': 'build/\n',
+            'src/.gitignore': 'generated/*\n!generated/keep.py\n',
+        }
+        write_files(self.directory, files)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def _collected(self, analyzer):
+        return sorted(os.path.relpath(path, self.directory) for path in analyzer.collect_files())
+    
+    def test_default_walk(self):
+        analyzer = rt.CodeAnalyzer([self.directory])
+        self.assertEqual(self._collected(analyzer), ['src/generated/keep.py', 'src/store.py', 'tasks.js'])
+        self.assertEqual(sorted(analyzer.skipped_files.values()), ['binary', 'minified'])
+    
+    def test_options_override_defaults(self):
+        analyzer = rt.CodeAnalyzer([self.directory], file_patterns=['*.js'], exclude=['!node_modules/', 'tasks.js'],
+                                   use_ignore_files=False, max_file_size=100)
+        self.assertEqual(self._collected(analyzer), [])
+        self.assertEqual(sorted(os.path.relpath(path, self.directory) for path in analyzer.skipped_files),
+                         ['build/out.js', 'bundle.js', 'node_modules/lib/index.js'])
+    
+    def test_nested_root_is_walked_once(self):
+        analyzer = rt.CodeAnalyzer([os.path.join(self.directory, 'src'), self.directory, self.directory + '/'])
+        self.assertEqual(self._collected(analyzer), ['src/generated/keep.py', 'src/store.py', 'tasks.js'])
+    
+    def test_root_below_excluded_directory_is_scanned(self):
+        analyzer = rt.CodeAnalyzer([self.directory, os.path.join(self.directory, 'node_modules', 'lib')])
+        self.assertEqual(self._collected(analyzer),
+                         ['node_modules/lib/index.js', 'src/generated/keep.py', 'src/store.py', 'tasks.js'])
+    
+    def test_linked_files_are_analyzed_once(self):
+        os.link(os.path.join(self.directory, 'tasks.js'), os.path.join(self.directory, 'hard.js'))
+        os.symlink('tasks.js', os.path.join(self.directory, 'soft.js'))
+        os.symlink('src', os.path.join(self.directory, 'src_link'))
+        
+        collected = self._collected(rt.CodeAnalyzer([self.directory, os.path.join(self.directory, 'src_link')]))
+        
+        self.assertEqual([path for path in collected if path.startswith('src')],
+                         ['src/generated/keep.py', 'src/store.py'])
+        self.assertEqual(len([path for path in collected if not path.startswith('src')]), 1)
+    
+    def test_ignore_rules(self):
+        rules = rt.IgnoreRules().extend('', ['*.log', '/docs/', 'a/**/z', '# comment', '!keep.log'])
+        self.assertTrue(rules.ignored('x/y.log'))
+        self.assertFalse(rules.ignored('x/keep.log'))
+        self.assertTrue(rules.ignored('docs', is_dir=True))
+        self.assertFalse(rules.ignored('docs'))
+        self.assertFalse(rules.ignored('x/docs', is_dir=True))
+        self.assertTrue(rules.ignored('a/z'))
+        self.assertTrue(rules.ignored('a/b/c/z'))
+
+
+class ParallelScanTest(unittest.TestCase):
+    """Scanning with --jobs must produce exactly the output of a serial scan"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        files = {'PROJECT_SPEC.md': AlignmentSessionTest.SPEC, 'tasks.js': SAMPLE_JS, 'bulk.js': SAMPLE_BULK_JS,
+                 'index.html': SAMPLE_HTML, 'style.css': SAMPLE_CSS, 'store.py': SAMPLE_PY}
+        write_files(self.directory, files)
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def test_worker_pool_keeps_walk_order(self):
+        rows = lambda evidence: [(e.file_path, e.line_number, e.code_type, e.name, e.content, e.context_span)
+                                 for e in evidence]
+        serial = rt.CodeAnalyzer([self.directory]).analyze_codebase()
+        parallel = rt.CodeAnalyzer([self.directory], jobs=2).analyze_codebase()
+        
+        self.assertEqual(rows(parallel), rows(serial))
+    
+    def test_reports_are_byte_identical(self):
+        # Each run is a separate process with its own hash seed
+        run_tracker(self.directory, '--no-cache')
+        serial = read_reports(self.directory)
+        run_tracker(self.directory, '--no-cache', '--jobs', '2')
+        
+        self.assertEqual(read_reports(self.directory), serial)
+
+
+class EvidenceCacheTest(unittest.TestCase):
+    """Cached evidence must be reused only while the file is unchanged"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, '.rtcache')
+        self.source_dir = os.path.join(self.directory, 'src')
+        self.path = os.path.join(self.source_dir, 'tasks.js')
+        os.makedirs(self.source_dir)
+        self._write(SAMPLE_JS)
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def _write(self, content, mtime_ns=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+        rt.source_lines.invalidate()
+    
+    def _scan(self):
+        cache = rt.EvidenceCache(self.cache_dir).load()
+        evidence = rt.CodeAnalyzer([self.source_dir], cache=cache).analyze_codebase()
+        return cache, [(e.line_number, e.code_type, e.name, e.content) for e in evidence]
+    
+    def _fresh_rows(self):
+        return [(e.line_number, e.code_type, e.name, e.content)
+                for e in rt.CodeAnalyzer([self.source_dir]).analyze_codebase()]
+    
+    def test_unchanged_file_is_reused(self):
+        self._scan()
+        cache, rows = self._scan()
+        
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(rows, self._fresh_rows())
+    
+    def test_edited_file_is_reparsed(self):
+        self._scan()
+        self._write(SAMPLE_JS + "\nfunction archiveTask(task) {\n    return task;\n}\n")
+        cache, rows = self._scan()
+        
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(rows, self._fresh_rows())
+    
+    def test_same_size_edit_with_new_mtime_is_reparsed(self):
+        self._scan()
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self._write(SAMPLE_JS.replace('deleteTask', 'removeTask'), mtime_ns + 10 ** 9)
+        cache, rows = self._scan()
+        
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(rows, self._fresh_rows())
+    
+    def test_touched_file_is_reused_by_content_hash(self):
+        self._scan()
+        mtime_ns = os.stat(self.path).st_mtime_ns + 10 ** 9
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+        cache, rows = self._scan()
+        
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(rows, self._fresh_rows())
+        self.assertEqual(rt.EvidenceCache(self.cache_dir).load().entries[self.path]['mtime_ns'], mtime_ns)
+    
+    
+    def test_unhashable_file_is_a_miss_and_not_stored(self):
+        def unreadable(file_path):
+            raise PermissionError(13, "Permission denied", file_path)
+        
+        cache = rt.EvidenceCache(self.cache_dir).load()
+        cache._hash_file = unreadable
+        rows = [(e.line_number, e.code_type, e.name, e.content)
+                for e in rt.CodeAnalyzer([self.source_dir], cache=cache).analyze_codebase()]
+        
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(rows, self._fresh_rows())
+        self.assertEqual(rt.EvidenceCache(self.cache_dir).load().entries, {})
+
+class AlignmentCacheTest(unittest.TestCase):
+    """Cached alignments must be identical to freshly scored ones"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, '.rtcache')
+        self.source_dir = os.path.join(self.directory, 'src')
+        write_files(self.source_dir, (('tasks.js', SAMPLE_JS), ('bulk.js', SAMPLE_BULK_JS), ('store.py', SAMPLE_PY)))
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def _match(self, cache=None):
+        evidence = rt.CodeAnalyzer([self.source_dir]).analyze_codebase()
+        return rt.RequirementMatcher(REQUIREMENTS, evidence, cache=cache).match_requirements_to_evidence()
+    
+    def test_second_run_reuses_every_alignment(self):
+        first = self._match(rt.AlignmentCache(self.cache_dir).load())
+        cache = rt.AlignmentCache(self.cache_dir).load()
+        second = self._match(cache)
+        
+        self.assertEqual(cache.hits, len(REQUIREMENTS))
+        self.assertEqual([alignment_key(a) for a in second], [alignment_key(a) for a in first])
+    
+    def test_changed_evidence_is_rescored(self):
+        self._match(rt.AlignmentCache(self.cache_dir).load())
+        with open(os.path.join(self.source_dir, 'store.py'), 'w', encoding='utf-8') as f:
+            f.write("\n" + SAMPLE_PY.replace('export_tasks', 'export_task_deadlines'))
+        rt.source_lines.invalidate()
+        
+        cache = rt.AlignmentCache(self.cache_dir).load()
+        cached = self._match(cache)
+        self.assertGreater(cache.misses, 0)
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual([alignment_key(a) for a in cached], [alignment_key(a) for a in self._match()])
+
+
+class EvidenceSnapshotTest(unittest.TestCase):
+    """A snapshot must reproduce requirements, evidence and context without the sources"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.directory, 'src')
+        write_files(self.source_dir, (('tasks.js', SAMPLE_JS), ('index.html', SAMPLE_HTML), ('store.py', SAMPLE_PY)))
+        self.snapshot_file = os.path.join(self.directory, 'evidence.rts')
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def test_round_trip_without_sources(self):
+        evidence = rt.CodeAnalyzer([self.source_dir]).analyze_codebase()
+        expected = rt.RequirementMatcher(REQUIREMENTS, evidence).match_requirements_to_evidence()
+        rows = [(e.file_path, e.line_number, e.code_type, e.name, e.content, e.context_lines) for e in evidence]
+        rt.EvidenceSnapshot.write(self.snapshot_file, REQUIREMENTS, evidence)
+        shutil.rmtree(self.source_dir)
+        rt.source_lines.invalidate()
+        
+        requirements, loaded = rt.EvidenceSnapshot.load(self.snapshot_file)
+        self.assertEqual(requirements, REQUIREMENTS)
+        self.assertEqual([(e.file_path, e.line_number, e.code_type, e.name, e.content, e.context_lines)
+                          for e in loaded], rows)
+        self.assertEqual(loaded.file_ranges, evidence.file_ranges)
+        actual = rt.RequirementMatcher(requirements, loaded).match_requirements_to_evidence()
+        self.assertEqual([alignment_key(a) for a in actual], [alignment_key(a) for a in expected])
+    
+    def test_rejects_other_files(self):
+        with open(self.snapshot_file, 'wb') as f:
+            f.write(b'not a snapshot at all')
+        with self.assertRaises(ValueError):
+            rt.EvidenceSnapshot.load(self.snapshot_file)
+
+
+class AlignmentSessionTest(unittest.TestCase):
+    """Incremental refreshes must agree with a full run over the same files"""
+    
+    SPEC = """\
+# Spec
+
+## Tasks
+* As a user, I want to create a task with a deadline
+* As a user, I want to delete a task from the task list
+
+## Zombies
+* As a player, I want to see the zombie track my progress
+"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spec_file = os.path.join(self.directory, 'SPEC.md')
+        self._write('SPEC.md', self.SPEC)
+        self._write('tasks.js', SAMPLE_JS)
+        self._write('bulk.js', SAMPLE_BULK_JS)
+        self._write('index.html', SAMPLE_HTML)
+        self.session = self._full_run()
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def _write(self, name, content):
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        # Make sure the mtime moves even on coarse-grained filesystems
+        stat = os.stat(os.path.join(self.directory, name))
+        os.utime(os.path.join(self.directory, name), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    
+    def _full_run(self):
+        session = rt.AlignmentSession([self.spec_file], [self.directory])
+        session.extract_requirements()
+        session.analyze_codebase()
+        session.match()
+        return session
+    
+    def assert_matches_full_run(self):
+        expected = self._full_run()
+        self.assertEqual([alignment_key(a) for a in self.session.alignments],
+                         [alignment_key(a) for a in expected.alignments])
+    
+    def test_refresh_without_changes(self):
+        update = self.session.refresh()
+        self.assertFalse(update.has_changes)
+    
+    def test_refresh_after_source_edit(self):
+        self._write('tasks.js', SAMPLE_JS.replace('function deleteTask', 'function removeTask'))
+        update = self.session.refresh()
+        self.assertEqual([os.path.basename(f) for f in update.changed_files], ['tasks.js'])
+        self.assert_matches_full_run()
+    
+    def test_refresh_after_new_and_removed_files(self):
+        self._write('store.py', SAMPLE_PY)
+        os.remove(os.path.join(self.directory, 'bulk.js'))
+        update = self.session.refresh()
+        self.assertEqual(len(update.removed_files), 1)
+        self.assert_matches_full_run()
+    
+    def test_refresh_after_spec_edit(self):
+        self._write('SPEC.md', self.SPEC + "* As a user, I want every task item to have a deadline\n")
+        update = self.session.refresh()
+        self.assertTrue(update.specs_changed)
+        self.assert_matches_full_run()
+
+
+class SpecDocumentTest(unittest.TestCase):
+    """Single-pass spec tokenizing must agree with slicing each section out"""
+    
+    SPEC = """\
+# Game System
+## Zombie Engine
+### Tasks
+* Users can create tasks with deadlines
+* Users can delete tasks they no longer need
+- The zombie advances as the deadline approaches
+#{1, } end of the level 1 section
+* Trailing bullet after the level 1 section
+"""
+    
+    def test_headers_and_sections(self):
+        document = rt.SpecDocument(self.SPEC)
+        # A title only counts as a header when the next line starts with '#'
+        self.assertEqual([(h.level, h.title) for h in document.headers],
+                         [(1, 'Game System'), (2, 'Zombie Engine')])
+        # Sections run to the end of the spec unless a '#{1,<level spaces>}' marker line ends them
+        self.assertTrue(document.section_text(document.headers[0]).endswith('the deadline approaches'))
+        self.assertTrue(document.section_text(document.headers[1]).endswith('after the level 1 section'))
+    
+    def test_find_all_matches_findall_per_section(self):
+        document = rt.SpecDocument(self.SPEC)
+        pattern = rt.RequirementExtractor.FEATURE_PATTERN
+        for header in reversed(document.headers):
+            start, end = document.section_bounds(header)
+            self.assertEqual(document.find_all(pattern, start, end), pattern.findall(self.SPEC[start:end]))
+    
+    def test_features_match_per_section_extraction(self):
+        directory = tempfile.mkdtemp()
+        try:
+            spec_file = os.path.join(directory, 'SPEC.md')
+            with open(spec_file, 'w', encoding='utf-8') as f:
+                f.write(self.SPEC)
+            extractor = rt.RequirementExtractor([spec_file])
+            features = [req for req in extractor.extract_requirements() if req.category.startswith('Feature')]
+        finally:
+            shutil.rmtree(directory)
+        
+        document = rt.SpecDocument(self.SPEC)
+        expected = []
+        for header in document.headers:
+            expected.extend(extractor._extract_features_from_section(document.section_text(header), header.title))
+        expected = extractor._deduplicate_requirements(expected)
+        
+        self.assertEqual(len(features), 5)
+        self.assertEqual([(req.id, req.text, req.category) for req in features],
+                         [(req.id, req.text, req.category) for req in expected])
+
+
+class StreamingPipelineTest(unittest.TestCase):
+    """The pipelined run must write the same reports as the staged one"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spec_file = os.path.join(self.directory, 'SPEC.md')
+        with open(self.spec_file, 'w', encoding='utf-8') as f:
+            f.write(AlignmentSessionTest.SPEC)
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('bulk.js', SAMPLE_BULK_JS), ('index.html', SAMPLE_HTML)))
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def _read_reports(self, directory):
+        contents = []
+        for name in ('requirement_alignment_matrix.csv', 'detailed_evidence.csv', 'alignment_summary.csv'):
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                contents.append(f.read())
+        return contents
+    
+    def _run(self, pipelined):
+        output = tempfile.mkdtemp(dir=self.directory)
+        session = rt.AlignmentSession([self.spec_file], [self.directory])
+        session.extract_requirements()
+        session.analyze_codebase(pipelined=pipelined)
+        cwd = os.getcwd()
+        os.chdir(output)
+        try:
+            if pipelined:
+                session.match_and_write_reports()
+            else:
+                session.match()
+                session.write_reports()
+        finally:
+            os.chdir(cwd)
+        return session, self._read_reports(output)
+    
+    def test_streamed_reports_match_staged_reports(self):
+        staged, staged_reports = self._run(pipelined=False)
+        streamed, streamed_reports = self._run(pipelined=True)
+        
+        self.assertEqual(streamed_reports, staged_reports)
+        self.assertEqual([alignment_key(a) for a in streamed.alignments],
+                         [alignment_key(a) for a in staged.alignments])
+    
+    def test_prefetch_reraises_producer_errors(self):
+        def items():
+            yield 1
+            raise OSError("disk went away")
+        
+        consumed = []
+        with self.assertRaises(OSError):
+            for item in rt.prefetch(items(), size=1):
+                consumed.append(item)
+        self.assertEqual(consumed, [1])
+
+
+class SqliteReportTest(unittest.TestCase):
+    """The SQLite output must hold the same alignments as the CSV reports"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('index.html', SAMPLE_HTML), ('store.py', SAMPLE_PY)))
+        self.evidence = rt.CodeAnalyzer([self.directory]).analyze_codebase()
+        self.alignments = rt.RequirementMatcher(REQUIREMENTS, self.evidence).match_requirements_to_evidence()
+        self.database = os.path.join(self.directory, 'alignments.db')
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def test_tables_match_alignments(self):
+        rt.CSVReportGenerator(self.alignments).generate_sqlite(self.database, self.evidence)
+        
+        connection = sqlite3.connect(self.database)
+        try:
+            statuses = connection.execute(
+                "SELECT r.id, a.status FROM requirements r "
+                "JOIN alignments a ON a.requirement_position = r.position ORDER BY r.position"
+            ).fetchall()
+            self.assertEqual(statuses, [(a.requirement.id, a.status.value) for a in self.alignments])
+            self.assertEqual(connection.execute("SELECT count(*) FROM evidence").fetchone()[0], len(self.evidence))
+            
+            for position, alignment in enumerate(self.alignments):
+                linked = connection.execute(
+                    "SELECT e.file_path, e.line_number, e.name, l.evidence_score FROM alignment_evidence l "
+                    "JOIN evidence e ON e.id = l.evidence_id WHERE l.requirement_position = ? ORDER BY l.rank",
+                    (position,)
+                ).fetchall()
+                self.assertEqual(linked, [(e.file_path, e.line_number, e.name, score)
+                                          for e, score in zip(alignment.evidence, alignment.evidence_scores)])
+        finally:
+            connection.close()
+    
+    def test_rewrite_replaces_database(self):
+        rt.CSVReportGenerator(self.alignments).generate_sqlite(self.database)
+        rt.CSVReportGenerator(self.alignments[:1]).generate_sqlite(self.database)
+        
+        connection = sqlite3.connect(self.database)
+        try:
+            self.assertEqual(connection.execute("SELECT count(*) FROM alignments").fetchone()[0], 1)
+        finally:
+            connection.close()
+        self.assertFalse(os.path.exists(self.database + '.tmp'))
+
+
+class AlignmentServerTest(unittest.TestCase):
+    """Queries answered by the JSON-lines server"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        spec_file = os.path.join(self.directory, 'SPEC.md')
+        with open(spec_file, 'w', encoding='utf-8') as f:
+            f.write(AlignmentSessionTest.SPEC)
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('index.html', SAMPLE_HTML)))
+        self.session = rt.AlignmentSession([spec_file], [self.directory])
+        self.session.extract_requirements()
+        self.session.analyze_codebase()
+        self.session.match()
+        self.server = rt.AlignmentServer(self.session, "localhost:0")
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def test_server_does_not_fork_worker_pools(self):
+        session = rt.AlignmentSession([], [self.directory], jobs=4)
+        rt.AlignmentServer(session, "localhost:0")
+        self.assertEqual((session.analyzer.jobs, session.matcher.jobs), (1, 1))
+    
+    def test_alignment_and_location_queries(self):
+        alignment = next(a for a in self.session.alignments if a.evidence)
+        response = self.server.handle_request({'op': 'alignment', 'id': alignment.requirement.id})
+        self.assertTrue(response['ok'])
+        record = response['alignments'][0]
+        self.assertEqual(record['status'], alignment.status.value)
+        self.assertEqual([ev['score'] for ev in record['evidence']], alignment.evidence_scores)
+        
+        evidence = alignment.evidence[0]
+        response = self.server.handle_request({'op': 'location', 'file': evidence.file_path,
+                                               'line': evidence.line_number})
+        self.assertIn(alignment.requirement.id, [match['requirement']['id'] for match in response['requirements']])
+    
+    def test_errors(self):
+        self.assertFalse(self.server.handle_request({'op': 'alignment', 'id': 'US_missing'})['ok'])
+        self.assertFalse(self.server.handle_request({'op': 'location', 'file': 'tasks.js'})['ok'])
+        self.assertFalse(self.server.handle_request({'op': 'rescan', 'file': '/nonexistent.js'})['ok'])
+        self.assertFalse(self.server.handle_line(b'[1, 2]')['ok'])
+    
+    def test_rescan_io_errors_are_reported(self):
+        def refresh(force_files=()):
+            raise PermissionError(13, "Permission denied", 'tasks.js')
+        
+        self.session.refresh = refresh
+        response = self.server.handle_request({'op': 'rescan'})
+        self.assertFalse(response['ok'])
+        self.assertIn('Permission denied', response['error'])
+    
+    def test_rescan_over_tcp(self):
+        host, port = self.server.start().rsplit(':', 1)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with open(os.path.join(self.directory, 'tasks.js'), 'a', encoding='utf-8') as f:
+                f.write("function archiveTaskDeadline(task) { return task; }\n")
+            with socket.create_connection((host, int(port))) as connection:
+                stream = connection.makefile('rwb')
+                stream.write(json.dumps({'op': 'rescan', 'file': os.path.join(self.directory, 'tasks.js')}).encode() + b'\n')
+                stream.flush()
+                response = json.loads(stream.readline())
+        finally:
+            self.server.shutdown()
+            thread.join()
+        
+        self.assertTrue(response['ok'])
+        self.assertEqual([os.path.basename(f) for f in response['update']['changed_files']], ['tasks.js'])
+        self.assertIn('archiveTaskDeadline', [ev.name for ev in self.session.evidence])
+
+
+class PipelineMetricsTest(unittest.TestCase):
+    """Counters and timings collected during a run"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('style.css', SAMPLE_CSS)))
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_stage_counters_and_rates(self):
+        metrics = rt.PipelineMetrics()
+        with metrics.stage('analyze'):
+            evidence = rt.CodeAnalyzer([self.directory], metrics=metrics).analyze_codebase()
+        with metrics.stage('match'):
+            rt.RequirementMatcher(REQUIREMENTS, evidence, metrics=metrics).match_requirements_to_evidence()
+        
+        stages = metrics.to_dict()['stages']
+        self.assertEqual(stages['analyze']['files_scanned'], 2)
+        self.assertEqual(stages['analyze']['lines_scanned'], SAMPLE_JS.count('\n') + SAMPLE_CSS.count('\n'))
+        self.assertIn('lines_scanned_per_second', stages['analyze'])
+        self.assertEqual(stages['match']['requirements_matched'], len(REQUIREMENTS))
+        self.assertGreater(stages['match']['candidates_scored'], 0)
+        self.assertGreaterEqual(stages['match']['cpu_seconds'], 0)
+        
+        hits = metrics.to_dict()['pattern_hits']
+        self.assertEqual(hits[r'js:function\s+(\w+)\s*\('], 3)
+        self.assertEqual(hits[r'css:(?:(?<![\w-])|(?=[.#]))([.#]?[\w-]+)\s*{'], 4)
+        self.assertEqual(set(metrics.to_dict()['slowest_files']),
+                         {os.path.join(self.directory, name) for name in ('tasks.js', 'style.css')})
+    
+    def test_long_lines_are_skipped(self):
+        # Enough ordinary lines up front that the file is not sniffed as minified
+        with open(os.path.join(self.directory, 'vendor.js'), 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_JS * 20 + "function inlined() { return '" + "x(" * rt.MAX_LINE_LENGTH + "'; }\n")
+        metrics = rt.PipelineMetrics()
+        with metrics.stage('analyze'):
+            evidence = rt.CodeAnalyzer([self.directory], metrics=metrics).analyze_codebase()
+        
+        self.assertEqual(metrics.to_dict()['stages']['analyze']['long_lines_skipped'], 1)
+        self.assertNotIn('inlined', [item.name for item in evidence])
+        self.assertIn('updateZombieProgress', [item.name for item in evidence])
+    
+    def test_metrics_files_are_opt_in(self):
+        run_tracker(self.directory, '--no-cache')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'metrics.json')))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'metrics.csv')))
+        
+        run_tracker(self.directory, '--no-cache', '--metrics')
+        with open(os.path.join(self.directory, 'metrics.json'), encoding='utf-8') as f:
+            self.assertIn('analyze', json.load(f)['stages'])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'metrics.csv')))
+
+
+class CallWithBodyPatternTest(unittest.TestCase):
+    """The linear-time method pattern must find what the regex finds"""
+    
+    def test_matches_regex(self):
+        regex = rt._CallWithBodyPattern.pattern
+        pattern = rt._CallWithBodyPattern()
+        lines = [
+            "render(items) { return items; }",
+            "if (a(b) ) {x} else if(c){",
+            "f(g(h(x)) {",
+            "a(a(a(a(",
+            "a(a(a(a()x",
+            "foo(\n) {",
+            "x ( ) {} y(z){ w()",
+        ]
+        for line in lines:
+            expected = [(m.start(), m.group(1)) for m in re.finditer(regex, line)]
+            self.assertEqual([(m.start(), m.group(1)) for m in pattern.finditer(line)], expected, line)
+            for pos in range(len(line) + 1):
+                expected = re.compile(regex).search(line, pos)
+                actual = pattern.search(line, pos)
+                self.assertEqual(actual and (actual.start(), actual.group(1)),
+                                 expected and (expected.start(), expected.group(1)), (line, pos))
+
+
+class MatcherBackendTest(unittest.TestCase):
+    """Backend selection"""
+    
+    def test_numpy_backend_falls_back_without_numpy(self):
+        np, rt.np = rt.np, None
+        try:
+            matcher = rt.RequirementMatcher([], [], backend="numpy")
+        finally:
+            rt.np = np
+        self.assertEqual(matcher.backend, "python")
+    
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            rt.RequirementMatcher([], [], backend="fortran")
+
+
+@unittest.skipUnless('fork' in rt.multiprocessing.get_all_start_methods(), "parallel matching needs fork")
+class ParallelMatchingTest(unittest.TestCase):
+    """Matching across worker processes must agree with serial matching"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_files(self.directory, (('tasks.js', SAMPLE_JS), ('bulk.js', SAMPLE_BULK_JS), ('store.py', SAMPLE_PY)))
+        self.evidence = rt.CodeAnalyzer([self.directory]).analyze_codebase()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_alignments_match_serial_run(self):
+        expected = rt.RequirementMatcher(REQUIREMENTS, self.evidence).match_requirements_to_evidence()
+        metrics = rt.PipelineMetrics()
+        matcher = rt.RequirementMatcher(REQUIREMENTS, self.evidence, metrics=metrics, jobs=2)
+        matcher.PARALLEL_MIN_REQUIREMENTS = 1
+        actual = matcher.match_requirements_to_evidence()
+        
+        self.assertEqual([alignment_key(a) for a in actual], [alignment_key(a) for a in expected])
+        self.assertGreater(metrics.counters['match']['candidates_scored'], 0)
+
+
+class ShardingTest(unittest.TestCase):
+    """Scanning and matching in shards must reproduce an unsharded run"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        files = {'PROJECT_SPEC.md': AlignmentSessionTest.SPEC, 'tasks.js': SAMPLE_JS, 'bulk.js': SAMPLE_BULK_JS,
+                 'index.html': SAMPLE_HTML, 'style.css': SAMPLE_CSS, os.path.join('lib', 'store.py'): SAMPLE_PY}
+        write_files(self.directory, files)
+    
+    def tearDown(self):
+        rt.source_lines.invalidate()
+        shutil.rmtree(self.directory)
+    
+    def _run(self, *args):
+        run_tracker(self.directory, *args)
+    
+    def test_merged_shards_match_full_scan(self):
+        rows = lambda evidence: [(e.file_path, e.line_number, e.code_type, e.name, e.context_lines) for e in evidence]
+        expected = rows(rt.CodeAnalyzer([self.directory]).analyze_codebase())
+        snapshot_files = []
+        for index in (1, 2, 3):
+            analyzer = rt.CodeAnalyzer([self.directory], shard=(index, 3))
+            evidence = analyzer.analyze_codebase()
+            snapshot_files.append(os.path.join(self.directory, f'shard-{index}.rts'))
+            rt.EvidenceSnapshot.write(snapshot_files[-1], REQUIREMENTS, evidence,
+                                      shard=(index, 3), file_ranks=analyzer.file_ranks)
+        
+        requirements, merged = rt.EvidenceSnapshot.merge(snapshot_files[::-1])
+        self.assertEqual(requirements, REQUIREMENTS)
+        self.assertEqual(rows(merged), expected)
+        with self.assertRaises(ValueError):
+            rt.EvidenceSnapshot.merge(snapshot_files[:2])
+    
+    def test_shard_processes_write_the_full_reports(self):
+        self._run('--no-cache')
+        expected = read_reports(self.directory)
+        
+        for index in (1, 2):
+            self._run('--shard', f'{index}/2', '--write-snapshot', f'evidence-{index}.rts')
+        for index in (1, 2, 3):
+            self._run('--from-snapshot', 'evidence-1.rts', 'evidence-2.rts',
+                      '--shard', f'{index}/3', '--write-alignments', f'alignments-{index}.json')
+        self._run('--from-snapshot', 'evidence-2.rts', 'evidence-1.rts',
+                  '--merge-alignments', 'alignments-1.json', 'alignments-2.json', 'alignments-3.json')
+        
+        self.assertEqual(read_reports(self.directory), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()